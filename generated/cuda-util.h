@@ -1,6 +1,11 @@
 #pragma once
 
+#include <algorithm>
 #include <iostream>
+#include <type_traits>
+
+#include <cuda_bf16.h>
+#include <cuda_fp16.h>
 
 
 #define checkCudaError(...) \
@@ -15,3 +20,81 @@ inline void checkCudaErrorImpl(const std::string &file, int line, cudaError_t co
     if (checkGetLastError)
         checkCudaErrorImpl(file, line, cudaGetLastError(), false);
 }
+
+
+// grid for grid-stride loops - about as many blocks as can be resident on the device at once, but no more than numBlocks in each dimension
+inline dim3 gridStrideBlocks(dim3 numBlocks, dim3 blockSize) {
+    static const unsigned maxThreads = [] {
+        int device, numMultiProcessors, maxThreadsPerMultiProcessor;
+        checkCudaError(cudaGetDevice(&device));
+        checkCudaError(cudaDeviceGetAttribute(&numMultiProcessors, cudaDevAttrMultiProcessorCount, device));
+        checkCudaError(cudaDeviceGetAttribute(&maxThreadsPerMultiProcessor, cudaDevAttrMaxThreadsPerMultiProcessor, device));
+        return (unsigned) (numMultiProcessors * maxThreadsPerMultiProcessor);
+    }();
+
+    unsigned maxBlocks = std::max(1u, maxThreads / (blockSize.x * blockSize.y * blockSize.z));
+
+    numBlocks.x = std::min(numBlocks.x, maxBlocks);
+    maxBlocks = (maxBlocks + numBlocks.x - 1) / numBlocks.x;
+    numBlocks.y = std::min(numBlocks.y, maxBlocks);
+    maxBlocks = (maxBlocks + numBlocks.y - 1) / numBlocks.y;
+    numBlocks.z = std::min(numBlocks.z, maxBlocks);
+
+    return numBlocks;
+}
+
+
+// shrinks the tile sizes of a temporally blocked kernel, largest dimension first, until its shared memory of bytesPerPoint per point
+//   of a tile including a halo of numSteps points on each side fits into a block - returns the shared memory in bytes, 0 if it does not fit
+inline size_t fitTemporalTiles(size_t *tileSizes, int numDims, size_t numSteps, size_t bytesPerPoint) {
+    static const size_t maxSharedBytes = [] {
+        int device, sharedBytes;
+        checkCudaError(cudaGetDevice(&device));
+        checkCudaError(cudaDeviceGetAttribute(&sharedBytes, cudaDevAttrMaxSharedMemoryPerBlockOptin, device));
+        return (size_t) sharedBytes;
+    }();
+
+    while (true) {
+        size_t sharedBytes = bytesPerPoint;
+        for (int d = 0; d < numDims; ++d)
+            sharedBytes *= tileSizes[d] + 2 * numSteps;
+        if (sharedBytes <= maxSharedBytes)
+            return sharedBytes;
+
+        size_t *largest = std::max_element(tileSizes, tileSizes + numDims);
+        if (1 == *largest)
+            return 0;
+        *largest /= 2;
+    }
+}
+
+
+// arithmetic and comparisons mixing reduced precision and built-in types, e.g. 0.25 * u[i] or u[i] + 1, are evaluated in the reduced precision type
+#define REDUCED_PRECISION_MIXED_OPERATOR(tpe, op)                                                  \
+    template<typename S, typename std::enable_if<std::is_arithmetic<S>::value, int>::type = 0>   \
+    __host__ __device__ inline auto operator op(const tpe &lhs, const S &rhs) {                    \
+        return lhs op tpe((float) rhs);                                                            \
+    }                                                                                              \
+    template<typename S, typename std::enable_if<std::is_arithmetic<S>::value, int>::type = 0>   \
+    __host__ __device__ inline auto operator op(const S &lhs, const tpe &rhs) {                    \
+        return tpe((float) lhs) op rhs;                                                            \
+    }
+
+#define REDUCED_PRECISION_OPERATORS(tpe)                                                           \
+    REDUCED_PRECISION_MIXED_OPERATOR(tpe, +)                                                       \
+    REDUCED_PRECISION_MIXED_OPERATOR(tpe, -)                                                       \
+    REDUCED_PRECISION_MIXED_OPERATOR(tpe, *)                                                       \
+    REDUCED_PRECISION_MIXED_OPERATOR(tpe, /)                                                       \
+    REDUCED_PRECISION_MIXED_OPERATOR(tpe, ==)                                                      \
+    REDUCED_PRECISION_MIXED_OPERATOR(tpe, !=)                                                      \
+    REDUCED_PRECISION_MIXED_OPERATOR(tpe, <)                                                       \
+    REDUCED_PRECISION_MIXED_OPERATOR(tpe, <=)                                                      \
+    REDUCED_PRECISION_MIXED_OPERATOR(tpe, >)                                                       \
+    REDUCED_PRECISION_MIXED_OPERATOR(tpe, >=)                                                      \
+                                                                                                   \
+    inline std::ostream &operator<<(std::ostream &s, const tpe &value) {                           \
+        return s << (float) value;                                                                 \
+    }
+
+REDUCED_PRECISION_OPERATORS(__half)
+REDUCED_PRECISION_OPERATORS(__nv_bfloat16)
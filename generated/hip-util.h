@@ -1,5 +1,6 @@
 #pragma once
 
+#include <algorithm>
 #include <iostream>
 
 #include "hip/hip_runtime.h"
@@ -14,3 +15,51 @@ inline void checkHipError(hipError_t code, bool checkGetLastError = false) {
     if (checkGetLastError)
         checkHipError(hipGetLastError(), false);
 }
+
+
+// grid for grid-stride loops - about as many blocks as can be resident on the device at once, but no more than numBlocks in each dimension
+inline dim3 gridStrideBlocks(dim3 numBlocks, dim3 blockSize) {
+    static const unsigned maxThreads = [] {
+        int device, numMultiProcessors, maxThreadsPerMultiProcessor;
+        checkHipError(hipGetDevice(&device));
+        checkHipError(hipDeviceGetAttribute(&numMultiProcessors, hipDeviceAttributeMultiprocessorCount, device));
+        checkHipError(hipDeviceGetAttribute(&maxThreadsPerMultiProcessor, hipDeviceAttributeMaxThreadsPerMultiProcessor, device));
+        return (unsigned) (numMultiProcessors * maxThreadsPerMultiProcessor);
+    }();
+
+    unsigned maxBlocks = std::max(1u, maxThreads / (blockSize.x * blockSize.y * blockSize.z));
+
+    numBlocks.x = std::min(numBlocks.x, maxBlocks);
+    maxBlocks = (maxBlocks + numBlocks.x - 1) / numBlocks.x;
+    numBlocks.y = std::min(numBlocks.y, maxBlocks);
+    maxBlocks = (maxBlocks + numBlocks.y - 1) / numBlocks.y;
+    numBlocks.z = std::min(numBlocks.z, maxBlocks);
+
+    return numBlocks;
+}
+
+
+// shrinks the tile sizes of a temporally blocked kernel, largest dimension first, until its shared memory of bytesPerPoint per point
+//   of a tile including a halo of numSteps points on each side fits into a block - returns the shared memory in bytes, 0 if it does not fit
+inline size_t fitTemporalTiles(size_t *tileSizes, int numDims, size_t numSteps, size_t bytesPerPoint) {
+    static const size_t maxSharedBytes = [] {
+        int device, sharedBytes, sharedBytesOptin;
+        checkHipError(hipGetDevice(&device));
+        checkHipError(hipDeviceGetAttribute(&sharedBytes, hipDeviceAttributeMaxSharedMemoryPerBlock, device));
+        checkHipError(hipDeviceGetAttribute(&sharedBytesOptin, hipDeviceAttributeSharedMemPerBlockOptin, device));
+        return (size_t) std::max(sharedBytes, sharedBytesOptin);
+    }();
+
+    while (true) {
+        size_t sharedBytes = bytesPerPoint;
+        for (int d = 0; d < numDims; ++d)
+            sharedBytes *= tileSizes[d] + 2 * numSteps;
+        if (sharedBytes <= maxSharedBytes)
+            return sharedBytes;
+
+        size_t *largest = std::max_element(tileSizes, tileSizes + numDims);
+        if (1 == *largest)
+            return 0;
+        *largest /= 2;
+    }
+}
@@ -1,8 +1,28 @@
 #pragma once
 
+#include <algorithm>
+
 #include <sycl/sycl.hpp>
 
 
+// global range for grid-stride loops - about as many work-groups as can be active on the device at once, but no more than numGroups in each dimension
+template<int numDims>
+inline sycl::range<numDims> gridStrideRange(sycl::queue &q, sycl::range<numDims> numGroups, sycl::range<numDims> groupSize) {
+    static const size_t maxWorkItems = q.get_device().get_info<sycl::info::device::max_compute_units>()
+                                       * q.get_device().get_info<sycl::info::device::max_work_group_size>();
+
+    size_t maxGroups = std::max<size_t>(1, maxWorkItems / groupSize.size());
+
+    // the last dimension is the contiguous one
+    for (int d = numDims - 1; d >= 0; --d) {
+        numGroups[d] = std::min(numGroups[d], maxGroups);
+        maxGroups = (maxGroups + numGroups[d] - 1) / numGroups[d];
+    }
+
+    return numGroups * groupSize;
+}
+
+
 template<typename tpe>
 inline void setFieldToZero(sycl::queue &q, size_t nx, tpe *field) {
     q.memset(field, 0, nx * sizeof(tpe));
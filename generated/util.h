@@ -1,9 +1,21 @@
 #pragma once
 
+#include <algorithm>
 #include <chrono>
 #include <cmath>
 #include <cstdlib>
+#include <initializer_list>
+#include <iomanip>
 #include <iostream>
+#include <limits>
+#include <locale>
+#include <sstream>
+#include <string>
+#include <type_traits>
+#include <utility>
+#include <vector>
+
+#include <unistd.h>
 
 
 #ifdef __NVCC__
@@ -13,8 +25,116 @@
 #endif
 
 
+// reduced precision host types are printed as float, the device pass of HIP parses host code without the host's __BFLT16_MAX__
+#if defined(__FLT16_MAX__) && !defined(__NVCC__)
+inline std::ostream &operator<<(std::ostream &s, const _Float16 value) {
+    return s << (float) value;
+}
+#endif
+
+#if (defined(__BFLT16_MAX__) || defined(__HIP__)) && !defined(__NVCC__)
+inline std::ostream &operator<<(std::ostream &s, const __bf16 value) {
+    return s << (float) value;
+}
+#endif
+
+
+// exit code for configurations a binary does not support, e.g. a data type the compiler lacks - benchmark.py skips them
+constexpr int unsupportedExitCode = 77;
+
+// largest value up to which all integers are exactly representable in tpe, e.g. 2048 for half
 template<typename tpe>
-void printStats(const std::chrono::duration<double> elapsedSeconds, size_t nIt, size_t nCells, char* tpeName, size_t numBytesPerCell, size_t numFlopsPerCell) {
+inline double exactIntegerLimit() {
+    static const double limit = [] {
+        if (std::is_integral<tpe>::value)
+            return std::numeric_limits<double>::infinity();
+
+        double p = 1;
+        while (p + 1 != p && (double) (tpe) (p + 1) == p + 1)
+            p *= 2;
+        return p;
+    }();
+    return limit;
+}
+
+// expected value of adding increment num times to init in tpe, including the rounding of reduced precision types in solution checks
+template<typename tpe>
+inline tpe repeatedAdd(double init, double increment, size_t num) {
+    if (init + increment * num <= exactIntegerLimit<tpe>())
+        return (tpe) (init + increment * num);
+
+    tpe value = (tpe) init;
+    for (size_t n = 0; n < num; ++n) {
+        const tpe next = value + (tpe) increment;
+        if (next == value)  // all further additions are rounded away as well
+            break;
+        value = next;
+    }
+    return value;
+}
+
+// structured output of one JSON record per measurement, enabled by setting APEX_OUTPUT=json
+inline bool printRecords() {
+    static const bool enabled = nullptr != std::getenv("APEX_OUTPUT") && std::string("json") == std::getenv("APEX_OUTPUT");
+    return enabled;
+}
+
+// numbers of JSON records - JSON has no inf and nan, e.g. for the rates of a run too short to be timed, they are written as null
+struct JsonNumber {
+    double value;
+};
+
+inline std::ostream &operator<<(std::ostream &s, const JsonNumber number) {
+    if (!std::isfinite(number.value))
+        return s << "null";
+    return s << number.value;
+}
+
+// hardware counters of perf stat --control are only enabled around the measurement loop, benchmark.py passes the file descriptors
+//   of perf's control and acknowledgement pipes in APEX_PERF_CTL_FD and APEX_PERF_ACK_FD
+inline void perfControl(const char* command) {
+    static const int ctlFd = nullptr != std::getenv("APEX_PERF_CTL_FD") ? std::atoi(std::getenv("APEX_PERF_CTL_FD")) : -1;
+    static const int ackFd = nullptr != std::getenv("APEX_PERF_ACK_FD") ? std::atoi(std::getenv("APEX_PERF_ACK_FD")) : -1;
+    if (ctlFd < 0)
+        return;
+
+    // perf acknowledges each command once it is applied
+    const std::string line = std::string(command) + "\n";
+    if (write(ctlFd, line.c_str(), line.size()) < 0 || ackFd < 0)
+        return;
+    char ack[5];
+    if (read(ackFd, ack, sizeof(ack)) < 0)
+        return;
+}
+
+// minimum duration of a measurement when calibrating the number of iterations, configurable with APEX_CALIBRATION_TIME in seconds
+inline double calibrationTime() {
+    static const double time = nullptr != std::getenv("APEX_CALIBRATION_TIME") ? std::atof(std::getenv("APEX_CALIBRATION_TIME")) : 0.1;
+    return time;
+}
+
+template<typename tpe>
+void printStats(const std::chrono::duration<double> elapsedSeconds, size_t nIt, size_t nCells, char* tpeName, double numBytesPerCell, size_t numFlopsPerCell,
+                std::initializer_list<std::pair<const char*, double>> echo = {}) {
+    if (printRecords()) {
+        // independent of the global locale and without loss of precision
+        std::ostringstream record;
+        record.imbue(std::locale::classic());
+        record << std::setprecision(std::numeric_limits<double>::max_digits10);
+
+        record << "{\"type\": \"" << tpeName << "\", \"nCells\": " << nCells << ", \"nIt\": " << nIt;
+        for (const auto& e : echo)
+            record << ", \"" << e.first << "\": " << JsonNumber{e.second};
+        record << ", \"time\": " << JsonNumber{1e3 * elapsedSeconds.count()};
+        record << ", \"mlups\": " << JsonNumber{1e-6 * nCells * nIt / elapsedSeconds.count()};
+        record << ", \"bandwidth\": " << JsonNumber{1e-9 * numBytesPerCell * nCells * nIt / elapsedSeconds.count()};
+        record << ", \"compute\": " << JsonNumber{1e-9 * numFlopsPerCell * nCells * nIt / elapsedSeconds.count()};
+        record << "}\n";
+
+        std::cout << record.str();
+        return;
+    }
+
     std::cout << "  #cells / #it:  " << nCells << " / " << nIt << "\n";
     std::cout << "  type:          " << tpeName << "\n";
     std::cout << "  elapsed time:  " << 1e3 * elapsedSeconds.count() << " ms\n";
@@ -24,6 +144,30 @@ void printStats(const std::chrono::duration<double> elapsedSeconds, size_t nIt,
     std::cout << "  compute:       " << 1e-9 * numFlopsPerCell * nCells * nIt / elapsedSeconds.count() << " GFLOP/s\n";
 }
 
+void printKernelStats(const char* kernelName, double elapsedSeconds, size_t nIt, size_t nCells, double numBytesPerCell, size_t numFlopsPerCell) {
+    if (printRecords()) {
+        // follows the record of the measurement it belongs to
+        std::ostringstream record;
+        record.imbue(std::locale::classic());
+        record << std::setprecision(std::numeric_limits<double>::max_digits10);
+
+        record << "{\"kernel\": \"" << kernelName << "\"";
+        record << ", \"time\": " << JsonNumber{1e3 * elapsedSeconds};
+        record << ", \"bandwidth\": " << JsonNumber{1e-9 * numBytesPerCell * nCells * nIt / elapsedSeconds};
+        record << ", \"compute\": " << JsonNumber{1e-9 * numFlopsPerCell * nCells * nIt / elapsedSeconds};
+        record << "}\n";
+
+        std::cout << record.str();
+        return;
+    }
+
+    std::cout << "  kernel " << kernelName << ":\n";
+    std::cout << "    elapsed time:  " << 1e3 * elapsedSeconds << " ms\n";
+    std::cout << "    per iteration: " << 1e3 * elapsedSeconds / nIt << " ms\n";
+    std::cout << "    bandwidth:     " << 1e-9 * numBytesPerCell * nCells * nIt / elapsedSeconds << " GB/s\n";
+    std::cout << "    compute:       " << 1e-9 * numFlopsPerCell * nCells * nIt / elapsedSeconds << " GFLOP/s\n";
+}
+
 FCT_DECORATOR size_t ceilingDivide(size_t a, size_t b) {
     return (a + b - 1) / b;
 }
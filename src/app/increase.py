@@ -30,9 +30,9 @@ class Increase:
             kernels = [
                 backend.Kernel(f'init{cls.name_as_postfix}', sizes, [], fields, it_space,
                                 newline.join(str(a) for a in [
-                                    Assignment(data.access(iterators), f'(tpe){iterators[0]}')]),
+                                    Assignment(data.access(iterators), f'(tpe)(double){iterators[0]}')]),
                                 num_flop=0),
-                backend.generate_check_kernel(cls, fields, sizes, [], it_space, iterators[0] + Variable('nIt', 'size_t'), data.access(iterators)),
+                backend.generate_check_kernel(cls, fields, sizes, [], it_space, f'repeatedAdd<tpe>({iterators[0]}, 1, nIt)', data.access(iterators)),
                 backend.generate_parse_kernel(cls, sizes, [])
             ]
 
@@ -41,7 +41,7 @@ class MatrixAdd:
             kernels = [
                 backend.Kernel(f'init{cls.name_as_postfix}', sizes, [], fields, it_space, 
                                newline.join(f'{s}' for s in [Assignment(f.access(iterators), v) for f, v in init_vals.items()]), num_flop=0),
-                backend.generate_check_kernel(cls, fields, sizes, [], it_space, 1 + 2 * Variable('nIt', 'size_t'), a.access(iterators)),
+                backend.generate_check_kernel(cls, fields, sizes, [], it_space, 'repeatedAdd<tpe>(1, 2, nIt)', a.access(iterators)),
                 backend.generate_parse_kernel(cls, sizes, [])
             ]
 
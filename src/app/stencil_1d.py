@@ -1,7 +1,6 @@
 from backend.util_header import UtilHeader
 
 from node.assignment import Assignment
-from node.kernel import PseudoKernel
 from node.variable import Variable
 
 from util import newline
@@ -12,8 +11,8 @@ class Stencil1D:
     name_as_postfix = name.title().replace("-", "")
     group = 'benchmark'
     metric = 'bandwidth'
-    additional_parameters = []
-    default_parameters = ['double', 64 * 1024 * 1024, 2, 10]
+    additional_parameters = ['num_steps']
+    default_parameters = ['double', 64 * 1024 * 1024, 1, 2, 10]
     dimensionality = 1
 
     @classmethod
@@ -23,6 +22,9 @@ class Stencil1D:
         it_space = [[i, 1, s - 1] for i, s in zip(iterators, sizes)]
         full_it_space = [[i, 0, s] for i, s in zip(iterators, sizes)]
 
+        num_steps = Variable('numSteps', 'size_t')  # time steps per iteration, computed in a single pass over memory if supported
+        parameters = [num_steps]
+
         u = backend.Field('u', 'tpe', sizes)
         uNew = backend.Field('uNew', 'tpe', sizes)
 
@@ -60,20 +62,22 @@ class Stencil1D:
                 std::cout << "  Final residual is " << res << std::endl;
             '''
             kernels = [
-                backend.Kernel(f'init{cls.name_as_postfix}', sizes, [], fields, full_it_space, init, num_flop=0),
-                backend.Kernel(f'checkSolution{cls.name_as_postfix}', [*sizes, Variable('nIt', 'size_t')], fields, [], [], check, num_flop=0),
-                backend.generate_parse_kernel(cls, sizes, [])
+                backend.Kernel(f'init{cls.name_as_postfix}', [*sizes, *parameters], [], fields, full_it_space, init, num_flop=0),
+                backend.Kernel(f'checkSolution{cls.name_as_postfix}', [*sizes, Variable('nIt', 'size_t'), *parameters], fields, [], [], check, num_flop=0),
+                backend.generate_parse_kernel(cls, sizes, parameters)
             ]
 
         else:
-            kernels = [
-                backend.Kernel(cls.name[:-1] + 'D', sizes, [u], [uNew], it_space,
-                                Assignment(uNew.access(iterators), 0.5 * (u.access([iterators[0] - 1]) + u.access([iterators[0] + 1]))),
-                                num_flop=1 + 1 * 2),  # 1 MUL and 1 FMA
-                PseudoKernel(f'std::swap({u.d_name}, {uNew.d_name});')
-            ]
+            def update(src, dst, its):
+                return Assignment(dst.access(its), 0.5 * (src.access([its[0] - 1]) + src.access([its[0] + 1])))
+
+            kernels = backend.time_step_kernels(cls.name[:-1] + 'D', sizes, u, uNew, it_space, update, num_steps,
+                                                num_flop=1 + 1 * 2)  # 1 MUL and 1 FMA
+
+        application = backend.Application(backend, cls.name, sizes, parameters, kernels)
+        application.steps_per_it = num_steps
 
-        return backend.Application(backend, cls.name, sizes, [], kernels)
+        return application
 
     @classmethod
     def sizes_to_bench(cls):
@@ -81,4 +85,5 @@ class Stencil1D:
 
     @classmethod
     def params_to_bench(cls):
-        return [[]]
+        # num_steps
+        return [[1], [2], [4], [8]]
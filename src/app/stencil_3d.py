@@ -1,7 +1,6 @@
 from backend.util_header import UtilHeader
 
 from node.assignment import Assignment
-from node.kernel import PseudoKernel
 from node.variable import Variable
 
 
@@ -10,8 +9,8 @@ class Stencil3D:
     name_as_postfix = name.title().replace("-", "")
     group = 'benchmark'
     metric = 'bandwidth'
-    additional_parameters = []
-    default_parameters = ['double', 256, 256, 256, 2, 10]
+    additional_parameters = ['num_steps']
+    default_parameters = ['double', 256, 256, 256, 1, 2, 10]
     dimensionality = 3
 
     @classmethod
@@ -25,6 +24,9 @@ class Stencil3D:
         it_space = [[i, 1, s - 1] for i, s in zip(iterators, sizes)]
         full_it_space = [[i, 0, s] for i, s in zip(iterators, sizes)]
 
+        num_steps = Variable('numSteps', 'size_t')  # time steps per iteration, computed in a single pass over memory if supported
+        parameters = [num_steps]
+
         u = backend.Field('u', 'tpe', sizes)
         uNew = backend.Field('uNew', 'tpe', sizes)
 
@@ -67,26 +69,28 @@ class Stencil3D:
                 std::cout << "  Final residual is " << res << std::endl;
             '''
             kernels = [
-                backend.Kernel(f'init{cls.name_as_postfix}', sizes, [], fields, full_it_space, init, num_flop=0),
-                backend.Kernel(f'checkSolution{cls.name_as_postfix}', [*sizes, Variable('nIt', 'size_t')], fields, [], [], check, num_flop=0),
-                backend.generate_parse_kernel(cls, sizes, [])
+                backend.Kernel(f'init{cls.name_as_postfix}', [*sizes, *parameters], [], fields, full_it_space, init, num_flop=0),
+                backend.Kernel(f'checkSolution{cls.name_as_postfix}', [*sizes, Variable('nIt', 'size_t'), *parameters], fields, [], [], check, num_flop=0),
+                backend.generate_parse_kernel(cls, sizes, parameters)
             ]
 
         else:
-            kernels = [
-                backend.Kernel(cls.name[:-1] + 'D', sizes, [u], [uNew], it_space,
-                                Assignment(uNew.access(iterators), (1. / 6.) * (
-                                    u.access([iterators[0] - 1, iterators[1], iterators[2]])
-                                    + u.access([iterators[0] + 1, iterators[1], iterators[2]])
-                                    + u.access([iterators[0], iterators[1] - 1, iterators[2]])
-                                    + u.access([iterators[0], iterators[1] + 1, iterators[2]])
-                                    + u.access([iterators[0], iterators[1], iterators[2] - 1])
-                                    + u.access([iterators[0], iterators[1], iterators[2] + 1]))),
-                                num_flop=1 + 5 * 2),  # 1 MUL and 5 FMA
-                PseudoKernel(f'std::swap({u.d_name}, {uNew.d_name});')
-            ]
+            def update(src, dst, its):
+                return Assignment(dst.access(its), (1. / 6.) * (
+                    src.access([its[0] - 1, its[1], its[2]])
+                    + src.access([its[0] + 1, its[1], its[2]])
+                    + src.access([its[0], its[1] - 1, its[2]])
+                    + src.access([its[0], its[1] + 1, its[2]])
+                    + src.access([its[0], its[1], its[2] - 1])
+                    + src.access([its[0], its[1], its[2] + 1])))
+
+            kernels = backend.time_step_kernels(cls.name[:-1] + 'D', sizes, u, uNew, it_space, update, num_steps,
+                                                num_flop=1 + 5 * 2)  # 1 MUL and 5 FMA
+
+        application = backend.Application(backend, cls.name, sizes, parameters, kernels)
+        application.steps_per_it = num_steps
 
-        return backend.Application(backend, cls.name, sizes, [], kernels)
+        return application
 
     @classmethod
     def sizes_to_bench(cls):
@@ -94,4 +98,5 @@ class Stencil3D:
 
     @classmethod
     def params_to_bench(cls):
-        return [[]]
+        # num_steps
+        return [[1], [2], [4]]
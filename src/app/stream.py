@@ -31,10 +31,10 @@ class Stream:
             kernels = [
                 backend.Kernel(f'init{cls.name_as_postfix}', sizes, [], fields, it_space,
                                 newline.join(str(a) for a in [
-                                    Assignment(src.access(iterators), f'(tpe){iterators[0]}'),
+                                    Assignment(src.access(iterators), f'(tpe)(double){iterators[0]}'),
                                     Assignment(dest.access(iterators), f'(tpe)0')]),
                                 num_flop=0),
-                backend.generate_check_kernel(cls, fields, sizes, [], it_space, iterators[0] + Variable('nIt', 'size_t'), src.access(iterators)),
+                backend.generate_check_kernel(cls, fields, sizes, [], it_space, f'repeatedAdd<tpe>({iterators[0]}, 1, nIt)', src.access(iterators)),
                 backend.generate_parse_kernel(cls, sizes, [])
             ]
 
@@ -1,6 +1,7 @@
 from app.init import Init
 from app.stream import Stream
 from app.increase import Increase
+from app.stream_increase import StreamIncrease
 from app.matrix_add import MatrixAdd
 from app.stencil_1d import Stencil1D
 from app.stencil_2d import Stencil2D
@@ -14,7 +15,7 @@ from app.stream_strided import StreamStrided
 from app.fma_strided import FMAStrided
 
 def get_default_apps():
-    apps = {'all': [Init, Stream, Increase,
+    apps = {'all': [Init, Stream, Increase, StreamIncrease,
                     MatrixAdd,
                     Stencil1D, Stencil2D, Stencil3D,
                     FMA, SquareRoot,
@@ -1,17 +1,93 @@
 from pathlib import Path
 import subprocess
+import hashlib
+import json
+import math
 import os
+import time
 
+from compile_cache import CompileCache
 from platforms import platform
 
+from node.kernel import PseudoKernel
+
+from util import *
+
 
 class Backend:
     genToApex = False
+    genSweep = True
+    genKernelTimers = False
+    genFusedKernels = False
+
+    # data types dispatched by the generated main and the corresponding C++ type of the back end
+    types = {'int': 'int', 'long': 'long', 'float': 'float', 'double': 'double'}
+    type_guards = {}  # macros that need to be defined by the compiler for a type to be dispatched
+
+    host = False  # runs on the CPU only, e.g. for collecting hardware counters with perf
+    threaded = False  # number of threads and their binding are controlled with OMP_NUM_THREADS and OMP_PROC_BIND
+
+    format_cmd = ['clang-format', '-i', '-style=LLVM', '-style={ColumnLimit: 0, IndentWidth: 4, MaxEmptyLinesToKeep: 2}']
+    format_max_files_per_call = 256
+
+    util_headers = ['util.h']
+
+    TemporalKernel = None  # fuses several time steps into one pass over memory, see time_step_kernels
 
     @classmethod
     def default_name(cls, app):
         return f'{app}-{cls.short_name}'
 
+    @staticmethod
+    def default_tuning_file(machine):
+        # code generation settings tuned per app, e.g. block sizes written by tune.py
+        return Path('..') / 'machines' / 'tuning' / f'{machine}.json'
+
+    @staticmethod
+    def load_tuning(machine):
+        tuning_file = Backend.default_tuning_file(machine)
+        if not tuning_file.is_file():
+            return {}
+
+        return json.loads(tuning_file.read_text())
+
+    @classmethod
+    def time_step_kernels(cls, name, variables, src, dst, it_space, update, num_steps, num_flop=0):
+        # num_steps sweeps per iteration, each computing dst from src with update(src, dst, iterators) and swapping both fields
+        #   afterwards - back ends with a TemporalKernel compute all of them in a single pass over memory
+        kernel = cls.Kernel(name, variables, [src], [dst], it_space, update(src, dst, [it[0] for it in it_space]), num_flop=num_flop)
+        swap = PseudoKernel(f'std::swap({src.d_name}, {dst.d_name});')
+
+        if cls.TemporalKernel is not None:
+            return [cls.TemporalKernel(kernel, update, num_steps), swap]
+
+        return [
+            PseudoKernel(f'for (size_t step = 0; step < {num_steps}; ++step) {"{"}'),
+            kernel,
+            swap,
+            PseudoKernel('}')
+        ]
+
+    @classmethod
+    def kernel_timer_setup(cls, kernel):
+        return f'double kernelTime_{kernel.fct_name} = 0;'
+
+    @classmethod
+    def timed_launch(cls, kernel):
+        # host timer, synchronizing to include asynchronous execution
+        k = kernel.fct_name
+        sync = cls.synchronize()
+
+        return \
+            f'auto kernelStart_{k} = std::chrono::steady_clock::now();{newline}' + \
+            kernel.launch() + newline + \
+            (sync + newline if sync is not None else '') + \
+            f'kernelTime_{k} += std::chrono::duration<double>(std::chrono::steady_clock::now() - kernelStart_{k}).count();'
+
+    @classmethod
+    def kernel_timer_teardown(cls, kernel):
+        return None
+
     @classmethod
     def default_code_dir(cls, machine, app):
         if cls.genToApex:
@@ -24,7 +100,7 @@ class Backend:
         return f'{cls.default_name(app.name)}.{cls.file_extension}'
 
     @classmethod
-    def default_compile(cls, machine, app):
+    def default_toolchain(cls, machine):
         compiler, flags, libs = platform(machine, cls.name)
 
         if flags is None:
@@ -43,6 +119,12 @@ class Backend:
             flags = [f.replace(k, v) for f in flags]
             libs = [f.replace(k, v) for f in libs]
 
+        return compiler, flags, libs
+
+    @classmethod
+    def default_compile(cls, machine, app):
+        compiler, flags, libs = cls.default_toolchain(machine)
+
         return [compiler, *flags,
                 '-o', cls.default_bin_dir(machine, app) / cls.default_bin_file(machine, app),
                 cls.default_code_dir(machine, app) / cls.default_code_file(machine, app),
@@ -68,32 +150,127 @@ class Backend:
         return f'{machine}.csv'
 
     @classmethod
-    def print_code_file(cls, machine, app, code, format=True):
+    def print_code_file(cls, machine, app, code, format=True, defer=False):
+        # code is written to a staging file first and only replaces the actual file if the (formatted) content changed
+        #   with defer=True, formatting and updating is left to the caller, e.g. to batch it with other files
         output_folder = cls.default_code_dir(machine, app)
         Path(output_folder).mkdir(parents=True, exist_ok=True)
 
         output_file = cls.default_code_dir(machine, app) / cls.default_code_file(machine, app)
         print(f'    Writing to {output_file}')
 
-        with open(output_file, 'w+') as f:
+        with open(Backend.staging_file(output_file), 'w+') as f:
             print(code, file=f)
 
-        if format:
-            cls.format_code_file(machine, app)
+        if not defer:
+            if format:
+                Backend.format_code_files([Backend.staging_file(output_file)])
+            Backend.update_code_file(output_file)
+
+        return output_file
+
+    @staticmethod
+    def staging_file(output_file):
+        return output_file.with_name(f'.staged.{output_file.name}')
+
+    @staticmethod
+    def file_hash(file):
+        return hashlib.sha256(file.read_bytes()).hexdigest()
+
+    @staticmethod
+    def update_code_file(output_file):
+        # move the staging file to output_file unless both are identical - keeps the mtime of unchanged files for make
+        staging_file = Backend.staging_file(output_file)
+
+        if output_file.is_file() and Backend.file_hash(output_file) == Backend.file_hash(staging_file):
+            staging_file.unlink()
+            return False
+
+        os.replace(staging_file, output_file)
+        return True
 
     @classmethod
     def format_code_file(cls, machine, app):
         output_file = cls.default_code_dir(machine, app) / cls.default_code_file(machine, app)
         print(f'    Formatting {output_file}')
 
-        subprocess.check_call(['clang-format', '-i', '-style=LLVM', '-style={ColumnLimit: 0, IndentWidth: 4, MaxEmptyLinesToKeep: 2}', output_file])
+        subprocess.check_call([*Backend.format_cmd, output_file])
+
+    @staticmethod
+    def format_code_files(files, num_procs=1):
+        # format a whole batch of files with as few clang-format calls as possible, distributed over num_procs processes
+        files = list(dict.fromkeys(files))
+        if 0 == len(files):
+            return 0.
+
+        print(f'Formatting {len(files)} files ...')
+        start = time.perf_counter()
+
+        chunk_size = min(Backend.format_max_files_per_call, math.ceil(len(files) / num_procs))
+        chunks = [files[i: i + chunk_size] for i in range(0, len(files), chunk_size)]
+
+        for i in range(0, len(chunks), num_procs):
+            processes = [subprocess.Popen([*Backend.format_cmd, *chunk]) for chunk in chunks[i: i + num_procs]]
+            for process in processes:
+                if 0 != process.wait():
+                    raise subprocess.CalledProcessError(process.returncode, process.args)
+
+        elapsed = time.perf_counter() - start
+        print(f'Finished formatting in {elapsed:.2f} s')
+
+        return elapsed
+
+    @classmethod
+    def default_dependencies(cls, machine, app):
+        code_dir = cls.default_code_dir(machine, app)
+        shared_dir = code_dir / ('../..' if cls.genToApex else '../../..')
+
+        return [code_dir / cls.default_code_file(machine, app),
+                code_dir / f'{app.name}-util.h',
+                *[shared_dir / h for h in cls.util_headers]]
+
+    @classmethod
+    def default_fingerprint(cls, machine, app):
+        # covers the full compile command as well as the content of the code file and all included util headers
+        fingerprint = hashlib.sha256()
+        fingerprint.update(' '.join(str(c) for c in cls.default_compile(machine, app)).encode())
+        for dependency in cls.default_dependencies(machine, app):
+            fingerprint.update(dependency.read_bytes())
+
+        return fingerprint.hexdigest()
+
+    @classmethod
+    def default_fingerprint_file(cls, machine, app):
+        return cls.default_bin_dir(machine, app) / f'.{cls.default_bin_file(machine, app)}.fingerprint'
 
     @classmethod
-    def compile_bin(cls, machine, app):
+    def compile_bin(cls, machine, app, force=False):
         output_folder = cls.default_bin_dir(machine, app)
         Path(output_folder).mkdir(parents=True, exist_ok=True)
 
-        subprocess.check_call(cls.default_compile(machine, app))
+        bin_file = cls.default_bin_dir(machine, app) / cls.default_bin_file(machine, app)
+        fingerprint_file = cls.default_fingerprint_file(machine, app)
+        fingerprint = cls.default_fingerprint(machine, app)
+
+        if not force and bin_file.is_file() and fingerprint_file.is_file() and fingerprint == fingerprint_file.read_text():
+            print(f'    {bin_file} is up to date')
+            return False
+
+        cache_key = None
+        if CompileCache.enabled:
+            cache_key = CompileCache.key(*cls.default_toolchain(machine),
+                                         cls.default_code_dir(machine, app) / cls.default_code_file(machine, app),
+                                         cls.default_dependencies(machine, app))
+
+        if cache_key is not None and not force and CompileCache.restore(cache_key, bin_file):
+            print(f'    Restored {bin_file} from compile cache')
+        else:
+            subprocess.check_call(cls.default_compile(machine, app))
+            if cache_key is not None:
+                CompileCache.store(cache_key, bin_file)
+
+        fingerprint_file.write_text(fingerprint)
+        return True
 
     @classmethod
     def exec_bin(cls, machine, app):
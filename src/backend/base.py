@@ -3,6 +3,7 @@ from backend.backend import Backend
 from node.application import AbstractApplication
 from node.field import AbstractField
 from node.kernel import AbstractKernel
+from node.variable import Variable
 
 from util import *
 
@@ -12,10 +13,47 @@ class Base(Backend):
     short_name = 'base'
     file_extension = 'cpp'
 
+    types = {**Backend.types, 'half': '_Float16', 'bfloat16': '__bf16'}
+    type_guards = {'half': '__FLT16_MAX__', 'bfloat16': '__BFLT16_MAX__'}
+
+    host = True
+
+    # default points per tile of temporally blocked kernels per dimensionality, excluding the halo of numSteps points on each side -
+    #   tunable as temporalTileSizes
+    temporal_tile_sizes = {
+        1: [8192],
+        2: [512, 64],
+        3: [64, 16, 16]
+    }
+
+    # points per tile of tiled loop nests per dimensionality for apps without tuned tile sizes, see BaseTiled and OMPHostTiled
+    def_tile_sizes = {
+        2: [512, 32],
+        3: [256, 16, 16]
+    }
+
     @staticmethod
     def synchronize():
         return None
 
+    @staticmethod
+    def tiled_loops(it_space, tile_sizes, body):
+        # loops over all tiles enclosing the loops over the points of a tile, innermost loop over the first dimension in both cases
+        tiles = [Variable(f't{d}', it[0].tpe) for d, it in enumerate(it_space)]
+
+        for tile, t, loop in zip(tiles, tile_sizes, it_space):
+            body = \
+                f'for ({loop[0].tpe} {loop[0]} = {tile}; {loop[0]} < std::min<{loop[0].tpe}>({tile} + {t}, {loop[2]}); ++{loop[0]}) {"{"}{newline}' + \
+                body + newline + \
+                f'{"}"}'
+        for tile, t, loop in zip(tiles, tile_sizes, it_space):
+            body = \
+                f'for ({tile.tpe} {tile} = {loop[1]}; {tile} < {loop[2]}; {tile} += {t}) {"{"}{newline}' + \
+                body + newline + \
+                f'{"}"}'
+
+        return body
+
 
     class Field(AbstractField):
         def __init__(self, name, tpe, sizes):
@@ -49,12 +87,7 @@ class Base(Backend):
 
             return f'{self.fct_name}({parameters});'
 
-        def generate(self):
-            parameters = ', '.join(
-                [f'const {f.tpe} *__restrict__ {f.name}' for f in self.reads if f not in self.writes]
-                + [f'{f.tpe} *__restrict__ {f.name}' for f in self.writes]
-                + [f'{v.tpe} {v.name}' for v in self.variables])
-            
+        def loops(self):
             body_in_loops = f'{self.body}'
             for loop in self.it_space:
                 body_in_loops = \
@@ -62,10 +95,140 @@ class Base(Backend):
                     body_in_loops + newline + \
                     f'{"}"}'
 
+            return body_in_loops
+
+        def generate(self):
+            parameters = ', '.join(
+                [f'const {f.tpe} *__restrict__ {f.name}' for f in self.reads if f not in self.writes]
+                + [f'{f.tpe} *__restrict__ {f.name}' for f in self.writes]
+                + [f'{v.tpe} {v.name}' for v in self.variables])
+
             return \
                 (f'template<typename tpe>{newline}' if self.has_tpe_template else '') + \
                 f'inline void {self.fct_name}({parameters}) {"{"}{newline}' + \
-                body_in_loops + newline + \
+                self.loops() + newline + \
+                f'{"}"}{newline}'
+
+
+    class TemporalKernel(AbstractKernel):
+        # several time steps of kernel per pass over memory - each tile is loaded into a scratch buffer together with a halo of
+        #   numSteps points, updated numSteps times with a valid region shrinking by one point per step and written back
+        #   (overlapped tiling), a single step falls back to kernel
+        def __init__(self, kernel, update, num_steps):
+            super().__init__(kernel.name, kernel.variables, kernel.reads, kernel.writes, kernel.it_space, kernel.body, kernel.has_tpe_template, kernel.num_flop)
+            self.kernel = kernel
+            self.update = update
+            self.num_steps = num_steps
+            self.steps_per_pass = num_steps
+
+        def tune(self, tuning):
+            super().tune(tuning)
+            self.kernel.tune(tuning)
+
+        def tile_sizes(self):
+            return self.tuned('temporalTileSizes', Base.temporal_tile_sizes[len(self.it_space)])
+
+        def setUp(self):
+            # both scratch buffers of each thread are allocated once for all launches
+            scratch_size = ' * '.join(f'({t} + 2 * {self.num_steps})' for t in self.tile_sizes())
+
+            return f'{self.reads[0].tpe} *{self.fct_name}Scratch = 1 == {self.num_steps} ? nullptr : new {self.reads[0].tpe}[{self.num_threads()} * 2 * {scratch_size}];'
+
+        def tearDown(self):
+            return f'delete[] {self.fct_name}Scratch;'
+
+        def launch(self):
+            parameters = ', '.join(
+                [f.name for f in self.reads if f not in self.writes]
+                + [f.name for f in self.writes]
+                + [v.name for v in self.variables + [self.num_steps]]
+                + [f'{self.fct_name}Scratch'])
+
+            return \
+                f'if (1 == {self.num_steps}){newline}' + \
+                self.kernel.launch() + newline + \
+                f'else{newline}' + \
+                f'{self.fct_name}Blocked({parameters});'
+
+        def num_threads(self):
+            return '1'
+
+        def thread_num(self):
+            return '0'
+
+        def parallel_region(self, code):
+            return code
+
+        def tile_loops_pragma(self):
+            return ''
+
+        def generate(self):
+            parameters = ', '.join(
+                [f'const {f.tpe} *__restrict__ {f.name}' for f in self.reads if f not in self.writes]
+                + [f'{f.tpe} *__restrict__ {f.name}' for f in self.writes]
+                + [f'{v.tpe} {v.name}' for v in self.variables + [self.num_steps]]
+                + [f'{self.reads[0].tpe} *__restrict__ scratch'])
+
+            src, dst = self.reads[0], self.writes[0]
+            num_dims = len(self.it_space)
+            tile_sizes = self.tile_sizes()
+
+            scratch_sizes = [Variable(f's{d}', 'size_t') for d in range(num_dims)]
+            src_tile = AbstractField(f'{src.name}Tile', f'{src.name}Tile', src.tpe, scratch_sizes, False)
+            dst_tile = AbstractField(f'{dst.name}Tile', f'{dst.name}Tile', dst.tpe, scratch_sizes, False)
+            result_tile = AbstractField(f'{src.name}TileResult', f'{src.name}TileResult', src.tpe, scratch_sizes, False)
+            buffers = [AbstractField(f'{src.name}Tile{i}', f'{src.name}Tile{i}', src.tpe, scratch_sizes, False) for i in range(2)]
+
+            tiles = [Variable(f't{d}', 'size_t') for d in range(num_dims)]
+            offsets = [Variable(f'j{d}', 'size_t') for d in range(num_dims)]
+            positions = [t + j - self.num_steps for t, j in zip(tiles, offsets)]
+
+            def loops(prefix, ranges, bounds, body):
+                # offsets in the tile are clipped to the given bounds of the position in the domain, innermost loop over the first dimension
+                clipped = ''.join(
+                    f'const size_t {prefix}Begin{d} = std::max<long>({ranges[d][0]}, (long) ({bounds[d][0] + self.num_steps}) - (long) {tiles[d]});{newline}'
+                    f'const size_t {prefix}End{d} = std::min<long>({ranges[d][1]}, (long) ({bounds[d][1] + self.num_steps}) - (long) {tiles[d]});{newline}'
+                    for d in range(num_dims))
+                for d in range(num_dims):
+                    body = f'for (size_t {offsets[d]} = {prefix}Begin{d}; {offsets[d]} < {prefix}End{d}; ++{offsets[d]}) {"{"}{newline}{body}{newline}{"}"}'
+                return clipped + body
+
+            load = loops('load', [[0, s] for s in scratch_sizes], [[0, s] for s in src.sizes],
+                         f'{buffers[0].access(offsets)} = {buffers[1].access(offsets)} = {src.access(positions)};')
+            steps = loops('update', [['step + 1', f'{s} - step - 1'] for s in scratch_sizes], [it[1:] for it in self.it_space],
+                          f'{self.update(src_tile, dst_tile, offsets)}')
+            store = loops('store', [[self.num_steps, f'{self.num_steps} + {t}'] for t in tile_sizes], [it[1:] for it in self.it_space],
+                          f'{dst.access(positions)} = {result_tile.access(offsets)};')
+
+            tile_loops = f'// load the tile including its halo, points outside of the domain are never read{newline}' + \
+                load + 2 * newline + \
+                f'// valid region shrinks by one point per step, points outside of the iteration space keep their values{newline}' + \
+                f'for (size_t step = 0; step < {self.num_steps}; ++step) {"{"}{newline}' + \
+                f'const {src.tpe} *__restrict__ {src_tile.name} = 0 == step % 2 ? {buffers[0].name} : {buffers[1].name};{newline}' + \
+                f'{dst.tpe} *__restrict__ {dst_tile.name} = 0 == step % 2 ? {buffers[1].name} : {buffers[0].name};{newline}' + \
+                steps + newline + \
+                f'{"}"}{newline}' + \
+                newline + \
+                f'// write back the interior of the tile{newline}' + \
+                f'const {src.tpe} *__restrict__ {result_tile.name} = 0 == {self.num_steps} % 2 ? {buffers[0].name} : {buffers[1].name};{newline}' + \
+                store
+            for d, (it, t) in enumerate(zip(self.it_space, tile_sizes)):
+                tile_loops = f'for (size_t {tiles[d]} = {it[1]}; {tiles[d]} < {it[2]}; {tiles[d]} += {t}) {"{"}{newline}{tile_loops}{newline}{"}"}'
+
+            scratch = f'{src.tpe} *{buffers[0].name} = scratch + {self.thread_num()} * 2 * {buffers[0].totalSize()};{newline}' + \
+                f'{src.tpe} *{buffers[1].name} = {buffers[0].name} + {buffers[0].totalSize()};{newline}' + \
+                self.tile_loops_pragma() + \
+                tile_loops
+
+            return \
+                self.kernel.generate() + \
+                newline + \
+                (f'template<typename tpe>{newline}' if self.has_tpe_template else '') + \
+                f'inline void {self.fct_name}Blocked({parameters}) {"{"}{newline}' + \
+                f'// tiles of {" x ".join(str(t) for t in tile_sizes)} points and a halo of {self.num_steps} points on each side, one buffer per parity of the step{newline}' + \
+                ''.join(f'const size_t {s} = {t} + 2 * {self.num_steps};{newline}' for s, t in zip(scratch_sizes, tile_sizes)) + \
+                newline + \
+                self.parallel_region(scratch) + newline + \
                 f'{"}"}{newline}'
 
 
@@ -86,4 +249,23 @@ class Base(Backend):
                 newline + \
                 self.mainEnd() + \
                 2 * newline + \
+                self.mainSweep() + \
                 self.mainWrapper()
+
+
+class BaseTiled(Base):
+    name = 'Base Tiled'
+    short_name = 'base-tiled'
+
+
+    class Kernel(Base.Kernel):
+        def __init__(self, name, variables, reads, writes, it_space, body, has_tpe_template=True, num_flop=0):
+            super().__init__(name, variables, reads, writes, it_space, body, has_tpe_template, num_flop)
+
+        def loops(self):
+            if len(self.it_space) not in Base.def_tile_sizes:
+                return super().loops()
+
+            tile_sizes = self.tuned('tileSizes', Base.def_tile_sizes[len(self.it_space)])
+
+            return Base.tiled_loops(self.it_space, tile_sizes, f'{self.body}')
@@ -3,6 +3,7 @@ from backend.backend import Backend
 from node.application import AbstractApplication
 from node.field import AbstractField
 from node.kernel import AbstractKernel
+from node.variable import Variable
 
 from util import *
 
@@ -11,6 +12,9 @@ class Hip(Backend):
     '''Super class to HipExpl and HipMM'''
 
     file_extension = 'hip'
+    util_headers = ['util.h', 'hip-util.h']
+
+    types = {**Backend.types, 'half': '_Float16', 'bfloat16': '__bf16'}
 
     def_block_sizes = {
         1: [256],
@@ -18,10 +22,50 @@ class Hip(Backend):
         3: [16, 4, 4]
     }
 
+    # default points per tile of temporally blocked kernels per dimensionality, excluding the halo of numSteps points on each side -
+    #   tunable as temporalTileSizes and shrunk at run time until both tiles of a block including their halos fit into shared memory
+    temporal_tile_sizes = {
+        1: [2048],
+        2: [64, 16],
+        3: [16, 8, 8]
+    }
+
     @staticmethod
     def synchronize():
         return f'checkHipError(hipDeviceSynchronize(), true);'
 
+    @classmethod
+    def kernel_timer_setup(cls, kernel):
+        k = kernel.fct_name
+
+        return \
+            super().kernel_timer_setup(kernel) + newline + \
+            f'hipEvent_t kernelStart_{k}, kernelEnd_{k};{newline}' + \
+            f'checkHipError(hipEventCreate(&kernelStart_{k}));{newline}' + \
+            f'checkHipError(hipEventCreate(&kernelEnd_{k}));'
+
+    @classmethod
+    def timed_launch(cls, kernel):
+        # device side events, waiting for each kernel to finish
+        k = kernel.fct_name
+
+        return \
+            f'checkHipError(hipEventRecord(kernelStart_{k}));{newline}' + \
+            kernel.launch() + newline + \
+            f'checkHipError(hipEventRecord(kernelEnd_{k}));{newline}' + \
+            f'checkHipError(hipEventSynchronize(kernelEnd_{k}));{newline}' + \
+            f'float kernelMs_{k};{newline}' + \
+            f'checkHipError(hipEventElapsedTime(&kernelMs_{k}, kernelStart_{k}, kernelEnd_{k}));{newline}' + \
+            f'kernelTime_{k} += 1e-3 * kernelMs_{k};'
+
+    @classmethod
+    def kernel_timer_teardown(cls, kernel):
+        k = kernel.fct_name
+
+        return \
+            f'checkHipError(hipEventDestroy(kernelStart_{k}));{newline}' + \
+            f'checkHipError(hipEventDestroy(kernelEnd_{k}));'
+
 
     class Kernel(AbstractKernel):
         def __init__(self, name, variables, reads, writes, it_space, body, has_tpe_template=True, num_flop=0):
@@ -36,14 +80,27 @@ class Hip(Backend):
             num_dims = len(self.it_space)
             sizes = [s[2] for s in self.it_space]
 
-            block_size = ', '.join(str(s) for s in Hip.def_block_sizes[num_dims])
-            num_blocks = ', '.join(f'ceilingDivide({s}, {Hip.def_block_sizes[num_dims][d]})' for d, s in enumerate(sizes))
+            num_points = ' * '.join(f'({s})' for s in sizes)
 
-            if num_dims > 1:
-                block_size = f'dim3({block_size})'
-                num_blocks = f'dim3({num_blocks})'
+            # one launch per tuned size range, selected at run time - tuned block sizes are given as [max. number of points, block size]
+            #   pairs in ascending order, the last pair is not limited
+            launches = []
+            for max_points, block in self.tuned('blockSizes', [[None, Hip.def_block_sizes[num_dims]]]):
+                block_size = ', '.join(str(s) for s in block)
+                num_blocks = ', '.join(f'ceilingDivide({s}, {block[d]})' for d, s in enumerate(sizes))
+
+                num_blocks, block_size = self.launch_config(num_blocks, block_size)
+
+                launch = f'{self.fct_name}<<<{num_blocks}, {block_size}>>>({parameters});'
+                launches.append(launch if max_points is None else f'if ({num_points} <= {max_points}){newline}{launch}')
+
+            return f'{newline}else '.join(launches)
+
+        def launch_config(self, num_blocks, block_size):
+            if len(self.it_space) > 1:
+                return f'dim3({num_blocks})', f'dim3({block_size})'
 
-            return f'{self.fct_name}<<<{num_blocks}, {block_size}>>>({parameters});'
+            return num_blocks, block_size
 
         def generate(self):
             parameters = ', '.join(
@@ -69,6 +126,134 @@ class Hip(Backend):
                 f'{"}"}{newline}'
 
 
+    class TemporalKernel(AbstractKernel):
+        # several time steps of kernel per pass over memory - each block loads its tile together with a halo of numSteps points
+        #   into shared memory, updates it numSteps times with a valid region shrinking by one point per step and writes back
+        #   its interior (overlapped tiling), a single step falls back to kernel
+        def __init__(self, kernel, update, num_steps):
+            super().__init__(kernel.name, kernel.variables, kernel.reads, kernel.writes, kernel.it_space, kernel.body, kernel.has_tpe_template, kernel.num_flop)
+            self.kernel = kernel
+            self.update = update
+            self.num_steps = num_steps
+            self.steps_per_pass = num_steps
+
+        def tune(self, tuning):
+            super().tune(tuning)
+            self.kernel.tune(tuning)
+
+        def setUp(self):
+            # tiles shrink at run time until both buffers fit into the shared memory of a block, the attribute is set once
+            num_dims = len(self.it_space)
+            tile_sizes = self.tuned('temporalTileSizes', Hip.temporal_tile_sizes[num_dims])
+            fct = f'{self.fct_name}Blocked' + ('<tpe>' if self.has_tpe_template else '')
+
+            return \
+                f'size_t {self.fct_name}TileSizes[] = {{{", ".join(str(t) for t in tile_sizes)}}};{newline}' + \
+                f'size_t {self.fct_name}SharedBytes = 0;{newline}' + \
+                f'if (1 != {self.num_steps}) {"{"}{newline}' + \
+                f'{self.fct_name}SharedBytes = fitTemporalTiles({self.fct_name}TileSizes, {num_dims}, {self.num_steps}, 2 * sizeof({self.reads[0].tpe}));{newline}' + \
+                f'if (0 == {self.fct_name}SharedBytes) {"{"}{newline}' + \
+                f'std::cerr << "Tiles of {self.fct_name} do not fit into shared memory for " << {self.num_steps} << " steps" << std::endl;{newline}' + \
+                f'return unsupportedExitCode;{newline}' + \
+                f'{"}"}{newline}' + \
+                f'checkHipError(hipFuncSetAttribute(reinterpret_cast<const void *>(&{fct}), hipFuncAttributeMaxDynamicSharedMemorySize, (int) {self.fct_name}SharedBytes));{newline}' + \
+                f'{"}"}'
+
+        def launch(self):
+            num_dims = len(self.it_space)
+            tile_sizes = [f'{self.fct_name}TileSizes[{d}]' for d in range(num_dims)]
+
+            parameters = ', '.join(
+                [f.d_name for f in self.reads if f not in self.writes]
+                + [f.d_name for f in self.writes]
+                + [v.name for v in self.variables + [self.num_steps]]
+                + tile_sizes)
+
+            block_size = ', '.join(str(s) for s in Hip.def_block_sizes[num_dims])
+            num_blocks = ', '.join(f'ceilingDivide({it[2] - it[1]}, {t})' for it, t in zip(self.it_space, tile_sizes))
+            if num_dims > 1:
+                num_blocks, block_size = f'dim3({num_blocks})', f'dim3({block_size})'
+
+            fct = f'{self.fct_name}Blocked' + ('<tpe>' if self.has_tpe_template else '')
+
+            return \
+                f'if (1 == {self.num_steps}) {"{"}{newline}' + \
+                self.kernel.launch() + newline + \
+                f'{"}"} else {"{"}{newline}' + \
+                f'{fct}<<<{num_blocks}, {block_size}, {self.fct_name}SharedBytes>>>({parameters});{newline}' + \
+                f'{"}"}'
+
+        def generate(self):
+            src, dst = self.reads[0], self.writes[0]
+            num_dims = len(self.it_space)
+            tile_sizes = [Variable(f'tileSize{d}', 'size_t') for d in range(num_dims)]
+
+            parameters = ', '.join(
+                [f'const {f.tpe} *__restrict__ {f.name}' for f in self.reads if f not in self.writes]
+                + [f'{f.tpe} *__restrict__ {f.name}' for f in self.writes]
+                + [f'{v.tpe} {v.name}' for v in self.variables + [self.num_steps] + tile_sizes])
+
+            scratch_sizes = [Variable(f's{d}', 'size_t') for d in range(num_dims)]
+            src_tile = AbstractField(f'{src.name}Tile', f'{src.name}Tile', src.tpe, scratch_sizes, False)
+            dst_tile = AbstractField(f'{dst.name}Tile', f'{dst.name}Tile', dst.tpe, scratch_sizes, False)
+            result_tile = AbstractField(f'{src.name}TileResult', f'{src.name}TileResult', src.tpe, scratch_sizes, False)
+            buffers = [AbstractField(f'{src.name}Tile{i}', f'{src.name}Tile{i}', src.tpe, scratch_sizes, False) for i in range(2)]
+
+            tiles = [Variable(f't{d}', 'size_t') for d in range(num_dims)]
+            offsets = [Variable(f'j{d}', 'size_t') for d in range(num_dims)]
+            positions = [t + j - self.num_steps for t, j in zip(tiles, offsets)]
+
+            def loops(prefix, ranges, bounds, body):
+                # offsets in the tile are clipped to the given bounds of the position in the domain and distributed over the
+                #   threads of the block
+                clipped = ''.join(
+                    f'const size_t {prefix}Begin{d} = max((long) ({ranges[d][0]}), (long) ({bounds[d][0] + self.num_steps}) - (long) {tiles[d]});{newline}'
+                    f'const size_t {prefix}End{d} = min((long) ({ranges[d][1]}), (long) ({bounds[d][1] + self.num_steps}) - (long) {tiles[d]});{newline}'
+                    for d in range(num_dims))
+                for d, c in enumerate(dim_to_char[0: num_dims]):
+                    body = f'for (size_t {offsets[d]} = {prefix}Begin{d} + threadIdx.{c}; {offsets[d]} < {prefix}End{d}; {offsets[d]} += blockDim.{c}) {"{"}{newline}{body}{newline}{"}"}'
+                return clipped + body
+
+            load = loops('load', [[0, s] for s in scratch_sizes], [[0, s] for s in src.sizes],
+                         f'{buffers[0].access(offsets)} = {buffers[1].access(offsets)} = {src.access(positions)};')
+            steps = loops('update', [['step + 1', f'{s} - step - 1'] for s in scratch_sizes], [it[1:] for it in self.it_space],
+                          f'{self.update(src_tile, dst_tile, offsets)}')
+            store = loops('store', [[self.num_steps, f'{self.num_steps} + {t}'] for t in tile_sizes], [it[1:] for it in self.it_space],
+                          f'{dst.access(positions)} = {result_tile.access(offsets)};')
+
+            return \
+                self.kernel.generate() + \
+                newline + \
+                (f'template<typename tpe>{newline}' if self.has_tpe_template else '') + \
+                f'__global__ void {self.fct_name}Blocked({parameters}) {"{"}{newline}' + \
+                f'// tiles of {" x ".join(str(t) for t in tile_sizes)} points and a halo of {self.num_steps} points on each side, one buffer per parity of the step{newline}' + \
+                ''.join(f'const size_t {s} = {t} + 2 * {self.num_steps};{newline}' for s, t in zip(scratch_sizes, tile_sizes)) + \
+                newline + \
+                f'extern __shared__ __align__(16) unsigned char sharedMemory[];{newline}' + \
+                f'{src.tpe} *{buffers[0].name} = reinterpret_cast<{src.tpe} *>(sharedMemory);{newline}' + \
+                f'{src.tpe} *{buffers[1].name} = {buffers[0].name} + {buffers[0].totalSize()};{newline}' + \
+                newline + \
+                ''.join(f'const size_t {tiles[d]} = {it[1]} + blockIdx.{c} * {t};{newline}'
+                        for d, (it, t, c) in enumerate(zip(self.it_space, tile_sizes, dim_to_char))) + \
+                newline + \
+                f'// load the tile including its halo, points outside of the domain are never read{newline}' + \
+                load + newline + \
+                f'__syncthreads();{newline}' + \
+                newline + \
+                f'// valid region shrinks by one point per step, points outside of the iteration space keep their values{newline}' + \
+                f'for (size_t step = 0; step < {self.num_steps}; ++step) {"{"}{newline}' + \
+                f'const {src.tpe} *__restrict__ {src_tile.name} = 0 == step % 2 ? {buffers[0].name} : {buffers[1].name};{newline}' + \
+                f'{dst.tpe} *__restrict__ {dst_tile.name} = 0 == step % 2 ? {buffers[1].name} : {buffers[0].name};{newline}' + \
+                steps + newline + \
+                f'__syncthreads();{newline}' + \
+                f'{"}"}{newline}' + \
+                newline + \
+                f'// write back the interior of the tile{newline}' + \
+                f'const {src.tpe} *__restrict__ {result_tile.name} = 0 == {self.num_steps} % 2 ? {buffers[0].name} : {buffers[1].name};{newline}' + \
+                store + newline + \
+                f'{"}"}{newline}'
+
+
     class Application(AbstractApplication):
         def __init__(self, backend, app, sizes, parameters, kernels):
             super().__init__(backend, app, sizes, parameters, kernels)
@@ -91,6 +276,7 @@ class Hip(Backend):
                 newline + \
                 self.mainEnd() + \
                 2 * newline + \
+                self.mainSweep() + \
                 self.mainWrapper()
 
 
@@ -151,3 +337,39 @@ class HipMM(Hip):
 
         def copyToHost(self):
             return f'checkHipError(hipMemPrefetchAsync({self.name}, sizeof({self.tpe}) * {self.totalSize()}, hipCpuDeviceId));'
+
+
+class HipExplGridStride(HipExpl):
+    name = 'HIP Explicit Memory Grid-Stride'
+    short_name = 'hip-expl-grid-stride'
+
+
+    class Kernel(Hip.Kernel):
+        def __init__(self, name, variables, reads, writes, it_space, body, has_tpe_template=True, num_flop=0):
+            super().__init__(name, variables, reads, writes, it_space, body, has_tpe_template, num_flop)
+
+        def launch_config(self, num_blocks, block_size):
+            # no more blocks than can be resident on the device at once, each thread covers several elements
+            return f'gridStrideBlocks(dim3({num_blocks}), dim3({block_size}))', f'dim3({block_size})'
+
+        def generate(self):
+            parameters = ', '.join(
+                [f'const {f.tpe} *__restrict__ {f.name}' for f in self.reads if f not in self.writes]
+                + [f'{f.tpe} *__restrict__ {f.name}' for f in self.writes]
+                + [f'{v.tpe} {v.name}' for v in self.variables])
+
+            loops = [f'for ({self.it_space[d][0].tpe} {self.it_space[d][0]} = blockIdx.{s} * blockDim.{s} + threadIdx.{s}; '
+                     f'{self.it_space[d][0]} < {self.it_space[d][2]}; {self.it_space[d][0]} += gridDim.{s} * blockDim.{s}) {"{"}'
+                     for d, s in reversed(list(enumerate(dim_to_char[0: len(self.it_space)])))]
+
+            it_cond = ' && '.join(f'{self.it_space[d][0]} >= {self.it_space[d][1]}' for d in range(len(self.it_space)) if 0 != self.it_space[d][1])
+
+            body = f'if ({it_cond}) {"{"}{newline}{self.body}{newline}{"}"}' if '' != it_cond else f'{self.body}'
+
+            return \
+                (f'template<typename tpe>{newline}' if self.has_tpe_template else '') + \
+                f'__global__ void {self.fct_name}({parameters}) {"{"}{newline}' + \
+                newline.join(loops) + newline + \
+                body + newline + \
+                len(loops) * f'{"}"}{newline}' + \
+                f'{"}"}{newline}'
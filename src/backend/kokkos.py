@@ -15,6 +15,8 @@ class Kokkos(Backend):
 
     file_extension = 'cpp'
 
+    types = {**Backend.types, 'half': 'Kokkos::Experimental::half_t', 'bfloat16': 'Kokkos::Experimental::bhalf_t'}
+
     @classmethod
     def default_code_file(cls, machine, app):
         return f'{app.name}-kokkos.{cls.file_extension}'
@@ -119,7 +121,7 @@ class Kokkos(Backend):
         def __init__(self, backend, app, sizes, parameters, kernels):
             super().__init__(backend, app, sizes, parameters, kernels)
 
-        def generate(self):
+        def callArgs(self):
             size_list = ', '.join(f'{s}' for s in self.sizes)
             field_list = ', '.join(f'{f.h_name}.data()' for f in self.fields)
 
@@ -128,6 +130,50 @@ class Kokkos(Backend):
             else:
                 param_list = ''
 
+            return size_list, field_list, param_list
+
+        def mainInit(self):
+            size_list, field_list, param_list = self.callArgs()
+
+            return \
+                f'// init{newline}' + \
+                f'init{self.app.title().replace("-", "")}({field_list}, {size_list}{param_list});{newline}' + \
+                self.toDeviceCopies()
+
+        def mainCheck(self, num_it):
+            size_list, field_list, param_list = self.callArgs()
+
+            return \
+                f'// check solution{newline}' + \
+                f'checkSolution{self.app.title().replace("-", "")}({field_list}, {size_list}, {num_it}{param_list});{newline}'
+
+        def sweepSetUp(self):
+            return \
+                f'int c = 1;{newline}' + \
+                f'Kokkos::initialize(c, argv);{newline}' + \
+                f'{"{"}{newline}'
+
+        def sweepTearDown(self):
+            return \
+                f'{"}"}{newline}' + \
+                f'Kokkos::finalize();{newline}'
+
+        def sweepAllocate(self):
+            return ''
+
+        def sweepFree(self):
+            return ''
+
+        def sweepPoint(self):
+            # views are allocated per point since their extents determine the memory layout
+            return \
+                newline.join(f.d_allocate() for f in self.fields if f.has_device_ptr) + newline + \
+                newline + \
+                newline.join(f.h_allocate() for f in self.fields) + newline + \
+                newline + \
+                super().sweepPoint()
+
+        def generate(self):
             return f'#include <Kokkos_Core.hpp>{newline}' + \
                 newline + \
                 f'#include "{self.app}-util.h"{newline}' + \
@@ -143,21 +189,19 @@ class Kokkos(Backend):
                 newline + \
                 newline.join(f.h_allocate() for f in self.fields) + newline + \
                 newline + \
-                f'// init{newline}' + \
-                f'init{self.app.title().replace("-", "")}({field_list}, {size_list}{param_list});{newline}' + \
-                self.toDeviceCopies() + \
+                self.mainInit() + \
                 newline + \
                 self.mainMiddle() + \
                 newline + \
                 self.toHostCopies() + \
-                f'// check solution{newline}' + \
-                f'checkSolution{self.app.title().replace("-", "")}({field_list}, {size_list}, nIt + nItWarmUp{param_list});{newline}' + \
+                self.mainCheck('nItWarmUp + nItCalibration + nIt') + \
                 f'{"}"}{newline}' + \
                 f'Kokkos::finalize();{newline}' + \
                 newline + \
                 f'return 0;{newline}' + \
                 f'{"}"}{newline}' + \
                 2 * newline + \
+                self.mainSweep() + \
                 self.mainWrapper()
 
 
@@ -165,11 +209,16 @@ class KokkosSerial(Kokkos):
     name = 'Kokkos Host Serial'
     short_name = 'kokkos-serial'
 
+    host = True
+
 
 class KokkosOMPHost(Kokkos):
     name = 'Kokkos Host OpenMP'
     short_name = 'kokkos-omp-host'
 
+    host = True
+    threaded = True
+
 
 class KokkosCuda(Kokkos):
     name = 'Kokkos CUDA'
@@ -0,0 +1,104 @@
+from pathlib import Path
+import os
+
+from backend.backend import Backend
+
+from apps import get_default_apps
+from backends import get_default_backends
+from platforms import machines, platform
+
+from util import *
+
+
+class Ninja(Backend):
+    name = 'Ninja'
+    short_name = 'ninja'
+
+    file_extension = 'ninja'
+
+    @classmethod
+    def default_code_dir(cls, machine, app):
+        # one build graph for the whole generated tree
+        if cls.genToApex:
+            return Path('../../apex/src')
+        else:
+            return Path('..') / 'generated'
+
+    @classmethod
+    def default_code_file(cls, machine, app):
+        return 'build.ninja'
+
+    @staticmethod
+    def escape(s):
+        # ninja variables use $ - environment variables are forwarded to the shell running the build command
+        for k, v in {'$(WORK)': '$WORK', '$(HOME)': '$HOME'}.items():
+            s = s.replace(k, v)
+        return s.replace('$', '$$')
+
+    @staticmethod
+    def escape_path(s):
+        return Ninja.escape(s).replace(':', '$:').replace(' ', '$ ')
+
+    @classmethod
+    def generated_targets(cls):
+        # all (machine, app, backend) combinations with an existing code file and a known compiler
+        targets = {}
+        for machine in machines:
+            for app in get_default_apps()['all']:
+                for backend in get_default_backends(machine)['all']:
+                    code_file = backend.default_code_dir(machine, app) / backend.default_code_file(machine, app)
+                    bin_file = backend.default_bin_dir(machine, app) / backend.default_bin_file(machine, app)
+
+                    if code_file.is_file() and platform(machine, backend.name)[0] is not None:
+                        targets.setdefault(bin_file, (machine, app, backend))
+
+        return list(targets.values())
+
+    @classmethod
+    def generate(cls, targets):
+        ninja_dir = cls.default_code_dir(None, None)
+
+        def rel(path):
+            return cls.escape_path(os.path.relpath(path, ninja_dir))
+
+        build_rules = []
+        machine_targets = {}
+        for machine, app, backend in targets:
+            compiler, flags, libs = platform(machine, backend.name)
+            bin_file = rel(backend.default_bin_dir(machine, app) / backend.default_bin_file(machine, app))
+            code_file, *headers = [rel(d) for d in backend.default_dependencies(machine, app)]
+
+            build_rules.append(f'''\
+build {bin_file}: compile {code_file} | {" ".join(headers)}
+  compiler = {cls.escape(compiler)}
+  flags = {" ".join(cls.escape(f) for f in flags or [])}
+  libs = {" ".join(cls.escape(l) for l in libs or [])}''')
+
+            machine_targets.setdefault(machine, []).append(bin_file)
+
+        build_rules = f'{newline}{newline}'.join(build_rules)
+
+        aliases = f'{newline}{newline}'.join(
+            f'build {machine}: phony {" ".join(bin_files)}' for machine, bin_files in machine_targets.items())
+
+        build_dir = Path('../../apex/build') if cls.genToApex else Path('..') / 'build'
+
+        return f'''\
+# build graph for all generated apps - usage: ninja -C {ninja_dir} [-j N] [machine]
+
+builddir = {rel(build_dir)}
+
+rule compile
+  command = $compiler $flags -o $out $in $libs
+  description = Compiling $out
+
+
+# build rules
+
+{build_rules}
+
+
+# aliases per machine
+
+{aliases}
+'''
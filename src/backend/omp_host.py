@@ -9,6 +9,8 @@ class OMPHost(Base):
     name = 'OpenMP Host'
     short_name = 'omp-host'
 
+    threaded = True
+
 
     class Kernel(AbstractKernel):
         def __init__(self, name, variables, reads, writes, it_space, body, has_tpe_template=True, num_flop=0):
@@ -22,12 +24,7 @@ class OMPHost(Base):
 
             return f'{self.fct_name}({parameters});'
 
-        def generate(self):
-            parameters = ', '.join(
-                [f'const {f.tpe} *__restrict__ {f.name}' for f in self.reads if f not in self.writes]
-                + [f'{f.tpe} *__restrict__ {f.name}' for f in self.writes]
-                + [f'{v.tpe} {v.name}' for v in self.variables])
-
+        def loops(self):
             body_in_loops = f'{self.body}'
             for loop in self.it_space:
                 body_in_loops = \
@@ -35,9 +32,63 @@ class OMPHost(Base):
                     body_in_loops + newline + \
                     f'{"}"}'
 
+            return f'#pragma omp parallel for schedule (static){newline}' + body_in_loops
+
+        def generate(self):
+            parameters = ', '.join(
+                [f'const {f.tpe} *__restrict__ {f.name}' for f in self.reads if f not in self.writes]
+                + [f'{f.tpe} *__restrict__ {f.name}' for f in self.writes]
+                + [f'{v.tpe} {v.name}' for v in self.variables])
+
             return \
                 (f'template<typename tpe>{newline}' if self.has_tpe_template else '') + \
                 f'inline void {self.fct_name}({parameters}) {"{"}{newline}' + \
-                f'#pragma omp parallel for schedule (static){newline}' + \
-                body_in_loops + newline + \
+                self.loops() + newline + \
                 f'{"}"}{newline}'
+
+
+    class TemporalKernel(Base.TemporalKernel):
+        def __init__(self, kernel, update, num_steps):
+            super().__init__(kernel, update, num_steps)
+
+        def num_threads(self):
+            return 'omp_get_max_threads()'
+
+        def thread_num(self):
+            return 'omp_get_thread_num()'
+
+        def parallel_region(self, code):
+            # scratch buffers per thread, tiles are distributed over all threads
+            return \
+                f'#pragma omp parallel{newline}' + \
+                f'{"{"}{newline}' + \
+                code + newline + \
+                f'{"}"}'
+
+        def tile_loops_pragma(self):
+            return f'#pragma omp for collapse({len(self.it_space)}) schedule(static){newline}'
+
+        def generate(self):
+            return f'#include <omp.h>{newline}' + \
+                newline + \
+                super().generate()
+
+
+class OMPHostTiled(OMPHost):
+    name = 'OpenMP Host Tiled'
+    short_name = 'omp-host-tiled'
+
+
+    class Kernel(OMPHost.Kernel):
+        def __init__(self, name, variables, reads, writes, it_space, body, has_tpe_template=True, num_flop=0):
+            super().__init__(name, variables, reads, writes, it_space, body, has_tpe_template, num_flop)
+
+        def loops(self):
+            # tiles are distributed over the threads
+            if len(self.it_space) not in Base.def_tile_sizes:
+                return super().loops()
+
+            tile_sizes = self.tuned('tileSizes', Base.def_tile_sizes[len(self.it_space)])
+
+            return f'#pragma omp parallel for collapse({len(self.it_space)}) schedule (static){newline}' + \
+                Base.tiled_loops(self.it_space, tile_sizes, f'{self.body}')
@@ -93,6 +93,7 @@ class OMPTargetExpl(OMPTarget):
                 newline + \
                 self.mainEnd() + \
                 2 * newline + \
+                self.mainSweep() + \
                 self.mainWrapper()
 
 
@@ -142,4 +143,5 @@ class OMPTargetMM(OMPTarget):
                 newline + \
                 self.mainEnd() + \
                 2 * newline + \
+                self.mainSweep() + \
                 self.mainWrapper()
@@ -96,6 +96,7 @@ class OpenAccExpl(OpenAcc):
                 newline + \
                 self.mainEnd() + \
                 2 * newline + \
+                self.mainSweep() + \
                 self.mainWrapper()
 
 
@@ -141,4 +142,5 @@ class OpenAccMM(OpenAcc):
                 newline + \
                 self.mainEnd() + \
                 2 * newline + \
+                self.mainSweep() + \
                 self.mainWrapper()
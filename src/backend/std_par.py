@@ -1,5 +1,6 @@
 import os
 
+from backend.backend import Backend
 from backend.base import Base
 
 from node.application import AbstractApplication
@@ -12,6 +13,12 @@ class StdPar(Base):
     name = 'std::par'
     short_name = 'std-par'
 
+    types = Backend.types
+
+    host = False  # may offload depending on the compiler
+
+    TemporalKernel = None  # the host tiled kernel of Base would not be parallelized
+
 
     class Kernel(AbstractKernel):
         def __init__(self, name, variables, reads, writes, it_space, body, has_tpe_template=True, num_flop=0):
@@ -93,4 +100,5 @@ class StdPar(Base):
                 newline + \
                 self.mainEnd() + \
                 2 * newline + \
+                self.mainSweep() + \
                 self.mainWrapper()
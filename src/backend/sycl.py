@@ -11,6 +11,9 @@ class Sycl(Backend):
     '''Super class to SyclBuffer, SyclExpl and SyclMM'''
 
     file_extension = 'cpp'
+    util_headers = ['util.h', 'sycl-util.h']
+
+    types = {**Backend.types, 'half': 'sycl::half', 'bfloat16': 'sycl::ext::oneapi::bfloat16'}
 
     def_block_sizes = {
         1: [256],
@@ -22,6 +25,23 @@ class Sycl(Backend):
     def synchronize():
         return f'q.wait();'
 
+    @classmethod
+    def queue_decl(cls):
+        if cls.genKernelTimers:  # profiling is required for per-kernel timings from events
+            return f'sycl::queue q({"{"}sycl::property::queue::in_order{"{}"}, sycl::property::queue::enable_profiling{"{}"}{"}"}); // in-order queue to remove need for waits after each kernel{newline}'
+
+        return f'sycl::queue q(sycl::property::queue::in_order{"{}"}); // in-order queue to remove need for waits after each kernel{newline}'
+
+    @classmethod
+    def timed_launch(cls, kernel):
+        # kernels return their event when generating kernel timers
+        k = kernel.fct_name
+
+        return \
+            f'sycl::event kernelEvent_{k} = {kernel.launch()}{newline}' + \
+            f'kernelEvent_{k}.wait();{newline}' + \
+            f'kernelTime_{k} += 1e-9 * (kernelEvent_{k}.get_profiling_info<sycl::info::event_profiling::command_end>() - kernelEvent_{k}.get_profiling_info<sycl::info::event_profiling::command_start>());'
+
 
 class SyclBuffer(Sycl):
     name = 'SYCL Buffer'
@@ -124,8 +144,8 @@ class SyclBuffer(Sycl):
 
             return \
                 (f'template<typename tpe>{newline}' if self.has_tpe_template else '') + \
-                f'inline void {self.fct_name}({parameters}) {"{"}{newline}' + \
-                queue_op + newline + \
+                f'inline {"sycl::event" if Sycl.genKernelTimers else "void"} {self.fct_name}({parameters}) {"{"}{newline}' + \
+                ('return ' if Sycl.genKernelTimers else '') + queue_op + newline + \
                 f'{"}"}{newline}'
 
 
@@ -133,6 +153,26 @@ class SyclBuffer(Sycl):
         def __init__(self, backend, app, sizes, parameters, kernels):
             super().__init__(backend, app, sizes, parameters, kernels)
 
+        def sweepSetUp(self):
+            return self.backend.queue_decl() + \
+                newline
+
+        def sweepPoint(self):
+            return \
+                self.mainInit() + \
+                newline + \
+                f'{"{"}{newline}' + \
+                newline.join(f.d_allocate() for f in self.fields) + newline + \
+                newline + \
+                self.mainWarmUp() + \
+                newline + \
+                self.mainCalibration() + \
+                newline + \
+                self.sweepMeasurement() + \
+                f'{"}"} // implicit D-H copy of destroyed buffers{newline}' + \
+                newline + \
+                self.mainCheck('nItWarmUp + nItCalibration + nRepeat * nIt')
+
         def generate(self):
             return f'#include "{self.app}-util.h"{newline}' + \
                 newline + \
@@ -142,7 +182,7 @@ class SyclBuffer(Sycl):
                 2 * newline + \
                 self.mainStart() + \
                 newline + \
-                f'sycl::queue q(sycl::property::queue::in_order{"{}"}); // in-order queue to remove need for waits after each kernel{newline}' + \
+                self.backend.queue_decl() + \
                 newline + \
                 self.mainAllocateAndInit() + \
                 newline + \
@@ -154,6 +194,7 @@ class SyclBuffer(Sycl):
                 newline + \
                 self.mainEnd() + \
                 2 * newline + \
+                self.mainSweep() + \
                 self.mainWrapper()
 
 
@@ -217,8 +258,8 @@ class SyclNoBuffer(Sycl):
 
             return \
                 (f'template<typename tpe>{newline}' if self.has_tpe_template else '') + \
-                f'inline void {self.fct_name}({parameters}) {"{"}{newline}' + \
-                queue_op + newline + \
+                f'inline {"sycl::event" if Sycl.genKernelTimers else "void"} {self.fct_name}({parameters}) {"{"}{newline}' + \
+                ('return ' if Sycl.genKernelTimers else '') + queue_op + newline + \
                 f'{"}"}{newline}'
 
 
@@ -226,6 +267,10 @@ class SyclNoBuffer(Sycl):
         def __init__(self, backend, app, sizes, parameters, kernels):
             super().__init__(backend, app, sizes, parameters, kernels)
 
+        def sweepSetUp(self):
+            return self.backend.queue_decl() + \
+                newline
+
         def generate(self):
             return f'#include "{self.app}-util.h"{newline}' + \
                 newline + \
@@ -235,7 +280,7 @@ class SyclNoBuffer(Sycl):
                 2 * newline + \
                 self.mainStart() + \
                 newline + \
-                f'sycl::queue q(sycl::property::queue::in_order{"{}"}); // in-order queue to remove need for waits after each kernel{newline}' + \
+                self.backend.queue_decl() + \
                 newline + \
                 self.mainAllocateAndInit() + \
                 newline + \
@@ -243,6 +288,7 @@ class SyclNoBuffer(Sycl):
                 newline + \
                 self.mainEnd() + \
                 2 * newline + \
+                self.mainSweep() + \
                 self.mainWrapper()
 
 
@@ -303,3 +349,55 @@ class SyclMM(SyclNoBuffer):
 
         def copyToHost(self):
             return None  # TODO prefetch f'q.memcpy({self.name}, {self.d_name}, sizeof({self.tpe}) * {self.totalSize()});'
+
+
+class SyclExplGridStride(SyclExpl):
+    name = 'SYCL Explicit Memory Grid-Stride'
+    short_name = 'sycl-expl-grid-stride'
+
+
+    class Kernel(SyclNoBuffer.Kernel):
+        def __init__(self, name, variables, reads, writes, it_space, body, has_tpe_template=True, num_flop=0):
+            super().__init__(name, variables, reads, writes, it_space, body, has_tpe_template, num_flop)
+
+        def generate(self):
+            parameters = ', '.join(
+                ['sycl::queue &q']
+                + [f'const {f.tpe} *__restrict__ {f.name}' for f in self.reads if f not in self.writes]
+                + [f'{f.tpe} *__restrict__ {f.name}' for f in self.writes]
+                + [f'{v.tpe} {v.name}' for v in self.variables])
+
+            dims = len(self.it_space)
+            sizes = [i[2] for i in self.it_space]
+            block_size = Sycl.def_block_sizes[dims]
+
+            # no more work-groups than can be active on the device at once, each work-item covers several elements
+            num_groups = ', '.join(reversed(list(f'ceilingDivide({s}, {b})' for s, b in zip(sizes, block_size))))
+            block_size = ', '.join(f'{b}' for b in reversed(block_size))
+
+            loops = [f'for ({self.it_space[d][0].tpe} {self.it_space[d][0]} = item.get_global_id({dims - d - 1}); '
+                     f'{self.it_space[d][0]} < {self.it_space[d][2]}; {self.it_space[d][0]} += item.get_global_range({dims - d - 1})) {"{"}'
+                     for d in reversed(range(dims))]
+
+            it_cond = ' && '.join(f'{self.it_space[d][0]} >= {self.it_space[d][1]}' for d in range(dims) if 0 != self.it_space[d][1])
+
+            body = f'if ({it_cond}) {"{"}{newline}{self.body}{newline}{"}"}' if '' != it_cond else f'{self.body}'
+
+            parallel_for = \
+                f'h.parallel_for(sycl::nd_range<{dims}>(gridStrideRange(q, sycl::range<{dims}>({num_groups}), sycl::range<{dims}>({block_size})), sycl::range<{dims}>({block_size})), ' + \
+                f'[=](sycl::nd_item<{dims}> item) {"{"}{newline}' + \
+                newline.join(loops) + newline + \
+                body + newline + \
+                len(loops) * f'{"}"}{newline}' + \
+                f'{"}"});'
+
+            queue_op = \
+                f'q.submit([&](sycl::handler &h) {"{"}{newline}' + \
+                parallel_for + newline + \
+                f'{"}"});'
+
+            return \
+                (f'template<typename tpe>{newline}' if self.has_tpe_template else '') + \
+                f'inline {"sycl::event" if Sycl.genKernelTimers else "void"} {self.fct_name}({parameters}) {"{"}{newline}' + \
+                ('return ' if Sycl.genKernelTimers else '') + queue_op + newline + \
+                f'{"}"}{newline}'
@@ -14,10 +14,12 @@ class UtilHeader(Base):
 
     file_extension = 'h'
 
+    genFusedKernels = False  # init and check kernels stay separate
+
     @classmethod
     def generate_check_kernel(cls, app, fields, sizes, parameters, it_space, expected, to_compare):
         check = f'''\
-            if ((tpe)({expected}) != {to_compare}) {'{'}
+            if ((tpe)(double)({expected}) != {to_compare}) {'{'}
             std::cerr << "{app.name_as_postfix} check failed for element " << {' << ", " << '.join(str(i[0]) for i in it_space)} << " (expected " << {expected} << " but got " << {to_compare} << ")" << std::endl;
             return;
         {'}'}'''
@@ -1,25 +1,26 @@
-from backend.base import Base
-from backend.omp_host import OMPHost
+from backend.base import Base, BaseTiled
+from backend.omp_host import OMPHost, OMPHostTiled
 from backend.omp_target import OMPTargetExpl, OMPTargetMM
 from backend.openacc import OpenAccExpl, OpenAccMM
-from backend.cuda import CudaExpl, CudaMM
-from backend.hip import HipExpl, HipMM
-from backend.sycl import SyclBuffer, SyclExpl, SyclMM
+from backend.cuda import CudaExpl, CudaMM, CudaExplGridStride
+from backend.hip import HipExpl, HipMM, HipExplGridStride
+from backend.sycl import SyclBuffer, SyclExpl, SyclMM, SyclExplGridStride
 from backend.std_par import StdPar
 from backend.kokkos import KokkosSerial, KokkosOMPHost, KokkosCuda
 
 
 def get_default_backends(machine=None):
     all = [Base, OMPHost,
+           BaseTiled, OMPHostTiled,
            OMPTargetExpl, OMPTargetMM,
            OpenAccExpl, OpenAccMM]
 
     if machine is None or machine.startswith('nvidia'):
-        all.extend([CudaExpl, CudaMM])
+        all.extend([CudaExpl, CudaMM, CudaExplGridStride])
     if machine is None or machine.startswith('amd'):
-        all.extend([HipExpl, HipMM])
+        all.extend([HipExpl, HipMM, HipExplGridStride])
 
-    all.extend([SyclBuffer, SyclExpl, SyclMM,
+    all.extend([SyclBuffer, SyclExpl, SyclMM, SyclExplGridStride,
                 StdPar,
                 KokkosSerial, KokkosOMPHost, KokkosCuda])
 
@@ -1,145 +1,462 @@
+from pathlib import Path
+import json
 import math
 import os
 import re
+import statistics
 import subprocess
 import sys
-import time
-
-import pandas as pd
+import tempfile
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from apps import get_default_apps
 
 from backends import get_default_backends
-from backend.backend import Backend
 
+import measurements
+import roofline
 
-def benchmark(machine, app, backends, gpu_for_filename, num_repeat=3, show_plot=False):
-    print(f'Benchmarking {app.group}/{app.name} ...')
 
-    # set up output folder and create it if necessary
-    output_folder = Backend.default_measurement_dir(machine, app)
-    output_folder.mkdir(parents=True, exist_ok=True)
+# generic events - memory bandwidth events are machine specific (e.g. uncore_imc/data_reads/) and can be added with --perf=...
+default_perf_events = ['cycles', 'instructions', 'LLC-load-misses', 'LLC-store-misses']
+
+# data types measured by benchmark and campaign runs, types a back end does not support are skipped
+default_types = ['double']
+
+# exit code of binaries asked for a configuration they do not support, e.g. a data type their compiler lacks
+unsupported_exit_code = 77
+
+# number of threads and their binding of runs not part of a scaling sweep - 0 leaves the number of threads to the runtime
+default_affinity = (0, 'close')
+proc_binds = ['close', 'spread']
+
+
+def normalized_param(param):
+    # integer valued parameters read as floats, e.g. 1.0, are keyed like the integer passed to the binary
+    try:
+        value = float(param)
+    except (TypeError, ValueError):
+        return str(param)
+
+    return str(int(value)) if value.is_integer() else str(param)
+
+
+def measurement_key(gpu, backend, nx, ny, nz, n_it, n_warm, tpe, num_threads, proc_bind, params):
+    # normalized to be independent of the column types pandas infers when reading the csv file
+    return (str(gpu), str(backend), int(nx), int(ny), int(nz), int(n_it), int(n_warm), str(tpe), int(num_threads), str(proc_bind),
+            *[normalized_param(p) for p in params])
+
+
+def calibrated_key(key):
+    # calibrated measurements are identified independently of the number of iterations the binary chose, i.e. by the requested nIt = 0
+    return (*key[:5], 0, *key[6:])
+
 
-    # target output file and read it if already existent
-    output_file = output_folder / Backend.default_measurement_file(machine, app)
-    columns = ['index', 'gpu', 'backend', 'nx', 'ny', 'nz', 'nIt', 'nWarmUp', 'type', *app.additional_parameters, 'time', 'mlups', 'bandwidth', 'compute']
-    index = 'index'
+def iteration_counts(app, size):
+    num_cells = size**app.dimensionality
+    n_warm = 2
+    n_it = 2**(min(10, 1 + max(0, 46 - 2 * int(math.log2(num_cells)))))
 
-    if output_file.is_file():
-        df = pd.read_csv(output_file, header=0, names=columns, index_col=index)
-    else:  # output file doesn't exist already -> prepare new data frame
-        df = pd.DataFrame(columns=columns)
-        df.set_index(index, inplace=True)
+    if 'flops' == app.metric: # overwrite n_warm and n_it for compute heavy benchmarks that feature hot inner loop
+        n_warm = 2
+        n_it = 8
 
-    # prepare samples
+    return n_warm, n_it
+
+
+def measured_keys(app, df):
+    # index of all existing measurements for constant time lookups - measurements without the calibrated column used a fixed nIt
+    key_columns = ['gpu', 'backend', 'nx', 'ny', 'nz', 'nIt', 'nWarmUp', 'type', 'numThreads', 'procBind', *app.additional_parameters]
+    calibrated = df['calibrated'].eq(True) if 'calibrated' in df.columns else [False] * len(df)
+
+    measured = set()
+    for row, is_calibrated in zip(df[key_columns].itertuples(index=False), calibrated):
+        key = measurement_key(*row[0:10], row[10:])
+        measured.add(calibrated_key(key) if is_calibrated else key)
+
+    return measured
+
+
+def pending_points(app, backend, tpe, params, affinity, gpu_for_filename, measured, calibrate):
+    # all sizes not measured yet as (size, n_warm, n_it, key)
     # sizes_to_bench = [64, 1024] # dummy test input for debugging
-    sizes_to_bench = app.sizes_to_bench()
-    params_to_bench = app.params_to_bench()
+    points = []
+    for size in app.sizes_to_bench():
+        n_warm, n_it = iteration_counts(app, size)
+        if calibrate:  # let the binary double nIt until a run takes long enough
+            n_it = 0
+
+        key = measurement_key(gpu_for_filename, backend.name,
+                              size, size if app.dimensionality > 1 else 1, size if app.dimensionality > 2 else 1,
+                              n_it, n_warm, tpe, *affinity, params)
+
+        if key not in measured:
+            points.append((size, n_warm, n_it, key))
+
+    return points
+
+
+def num_cores(cpus):
+    # physical cores of the given cpus, hardware threads of the same core are counted once
+    cores = set()
+    for cpu in cpus:
+        topology = Path(f'/sys/devices/system/cpu/cpu{cpu}/topology')
+        try:
+            cores.add(((topology / 'physical_package_id').read_text().strip(), (topology / 'core_id').read_text().strip()))
+        except OSError:
+            cores.add(cpu)
+
+    return len(cores)
 
-    types = ['double']
 
-    # prepare environment variables
+def affinities(backend, max_threads):
+    # strong scaling from one thread to all cores for each binding, if requested and supported by the back end
+    if max_threads is None or not backend.threaded:
+        return [default_affinity]
+
+    thread_counts = [2**i for i in range(max_threads.bit_length()) if 2**i < max_threads] + [max_threads]
+    return [(num_threads, proc_bind) for proc_bind in proc_binds for num_threads in thread_counts]
+
+
+def format_affinity(affinity):
+    return '' if default_affinity == affinity else f' / {affinity[0]} threads ({affinity[1]})'
+
+
+def default_env():
     env = os.environ.copy()
     env['OMP_PROC_BIND'] = 'close'
     env['OMP_PLACES'] = 'cores'
+    env['APEX_OUTPUT'] = 'json'
+
+    return env
+
+
+def parse_records(out):
+    # single pass over the output, every line starting with { is one record printed by printStats or printKernelStats
+    records = []
+    for line in out.splitlines():
+        if line.startswith('{'):
+            record = json.loads(line)
+            if 'kernel' in record:  # per-kernel timing of the preceding measurement
+                records[-1].setdefault('kernels', []).append(record)
+            else:
+                records.append(record)
+
+    return records
+
+
+def parse_perf(perf_file):
+    # csv output of perf stat, one line of value, unit and event per counter - unsupported or uncounted events are left out
+    counters = {}
+    for line in perf_file.read_text().splitlines():
+        fields = line.split(',')
+        if len(fields) > 2 and not line.startswith('#'):
+            try:
+                counters[fields[2]] = float(fields[0])
+            except ValueError:
+                pass
+
+    return counters
+
+
+def run(cmd, env, perf_events=None, prefix=[]):
+    # prefix, e.g. taskset, applies to the measured binary and perf alike
+    if perf_events is None:
+        return parse_records(subprocess.check_output([*prefix, *cmd], env=env).decode('utf-8'))
+
+    # counters start disabled and are only enabled by the binary around its measurement loop, through perf's control pipe which
+    #   acknowledges each command - they are attached to all records of this launch
+    ctl_read, ctl_write = os.pipe()
+    ack_read, ack_write = os.pipe()
+    env = {**env, 'APEX_PERF_CTL_FD': f'{ctl_write}', 'APEX_PERF_ACK_FD': f'{ack_read}'}
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            perf_file = Path(tmp_dir) / 'perf.csv'
+            out = subprocess.check_output([*prefix, 'perf', 'stat', '--delay=-1', f'--control=fd:{ctl_read},{ack_write}',
+                                           '-x', ',', '-o', perf_file, '-e', ','.join(perf_events), '--', *cmd],
+                                          env=env, pass_fds=(ctl_read, ctl_write, ack_read, ack_write))
+            counters = parse_perf(perf_file)
+    finally:
+        for fd in [ctl_read, ctl_write, ack_read, ack_write]:
+            os.close(fd)
+
+    records = parse_records(out.decode('utf-8'))
+    for r in records:
+        r['counters'] = counters
+
+    return records
+
+
+def sample_stats(times):
+    # without samples or with a zero median the dispersion is infinite, i.e. the point is never converged on it
+    if len(times) == 0:
+        return {'min': math.nan, 'median': math.nan, 'mean': math.nan, 'stddev': math.inf, 'count': 0, 'dispersion': math.inf}
+
+    median = statistics.median(times)
+    stddev = statistics.stdev(times) if len(times) > 1 else math.inf
+
+    return {
+        'min': min(times),
+        'median': median,
+        'mean': statistics.mean(times),
+        'stddev': stddev,
+        'count': len(times),
+        # relative half width of the 95 % confidence interval of the median, using its asymptotic standard error
+        'dispersion': 1.96 * math.sqrt(math.pi / 2) * stddev / math.sqrt(len(times)) / median if median > 0 else math.inf
+    }
+
+
+def converged(times, rel_ci, max_repeat, time_budget):
+    # time budget in seconds of measured time per point, sample times are in ms
+    return sample_stats(times)['dispersion'] <= rel_ci or len(times) >= max_repeat or 1e-3 * sum(times) >= time_budget
+
+
+def run_points(bin_file, app, tpe, params, points, num_repeat, env, sweep, perf_events=None, prefix=[]):
+    if sweep:  # all sizes and repetitions in a single launch - n_warm is the same for all sizes
+        return run([bin_file, tpe, 'sweep', f'{num_repeat}', f'{points[0][1]}',
+                    *[f'{param}' for param in params],
+                    *[f'{n}' for size, _, n_it, _ in points for n in [*[size] * app.dimensionality, n_it]]],
+                   env, perf_events, prefix)
+
+    results = []
+    for size, n_warm, n_it, _ in points:
+        for _ in range(num_repeat):
+            results.extend(run([bin_file, tpe, *[f'{size}' for _ in range(app.dimensionality)],
+                                *[f'{param}' for param in params], f'{n_warm}', f'{n_it}'],
+                               env, perf_events, prefix))
+
+    return results
+
+
+def parse_cpu_list(cpu_list):
+    # e.g. 0-15,32-47
+    cpus = set()
+    for part in cpu_list.strip().split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            cpus.update(range(int(first), int(last) + 1))
+        elif '' != part:
+            cpus.add(int(part))
+
+    return cpus
+
+
+def core_cpus(cpu):
+    # hardware threads of the physical core of the given cpu
+    try:
+        return parse_cpu_list(Path(f'/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list').read_text())
+    except OSError:
+        return {cpu}
+
+
+def device_slots(machine):
+    # independent resources to pin concurrent measurements to - one per GPU and one per NUMA domain
+    slots = {'gpu': [], 'host': []}
+
+    if machine.startswith('nvidia'):
+        out = subprocess.check_output(['nvidia-smi', '-L']).decode('utf-8')
+        slots['gpu'] = [{'device': f'gpu{i}', 'env': {'CUDA_VISIBLE_DEVICES': i}, 'prefix': []}
+                        for i in re.findall(r'^GPU (\d+):', out, flags=re.MULTILINE)]
+    elif machine.startswith('amd'):
+        out = subprocess.check_output(['rocm-smi', '--showproductname']).decode('utf-8')
+        slots['gpu'] = [{'device': f'gpu{i}', 'env': {'HIP_VISIBLE_DEVICES': i}, 'prefix': []}
+                        for i in sorted(set(re.findall(r'GPU\[(\d+)\]', out)), key=int)]
+
+    # OpenMP runtimes restrict their threads and places to the cpus set with taskset
+    available = os.sched_getaffinity(0)
+    domains = []
+    for node in sorted(Path('/sys/devices/system/node').glob('node[0-9]*'), key=lambda n: int(n.name[len('node'):])):
+        cpus = parse_cpu_list((node / 'cpulist').read_text()) & available
+        if len(cpus) > 0:
+            domains.append((node.name, cpus))
+    if 0 == len(domains):
+        domains = [(None, available)]
+
+    # the host thread of each GPU slot gets a core of its own, taken from the NUMA domains in turn and excluded from the host
+    #   slots, so that concurrent host measurements do not delay kernel launches
+    reserved = set()
+    for i, slot in enumerate(slots['gpu']):
+        cpus = sorted(domains[i % len(domains)][1] - reserved)
+        if len(cpus) > 0:
+            core = core_cpus(cpus[-1]) & available
+            reserved |= core
+            slot['prefix'] = ['taskset', '-c', ','.join(f'{c}' for c in sorted(core))]
+
+    for name, cpus in domains:
+        cpus = sorted(cpus - reserved)
+        if len(cpus) > 0:
+            slots['host'].append({'device': name, 'env': {}, 'prefix': ['taskset', '-c', ','.join(f'{c}' for c in cpus)],
+                                  'cores': num_cores(cpus)})
+
+    # fall back to unpinned execution if no resources could be determined
+    for kind in slots:
+        if 0 == len(slots[kind]):
+            slots[kind] = [{'device': None, 'env': {}, 'prefix': [], 'cores': num_cores(available)}]
+
+    return slots
+
+
+def measure(machine, app, backend, tpe, params, affinity, points, gpu_for_filename, num_repeat, sweep, rel_ci, max_repeat, time_budget,
+            perf_events, slot=None):
+    # samples the given points until converged - returns one measurement per point and warnings for noisy ones
+    env = default_env()
+    num_threads, env['OMP_PROC_BIND'] = affinity
+    if num_threads > 0:
+        env['OMP_NUM_THREADS'] = f'{num_threads}'
+
+    prefix = []
+    if slot is not None:
+        env.update(slot['env'])
+        prefix = slot['prefix']
+
+    bin_file = backend.default_bin_dir(machine, app) / backend.default_bin_file(machine, app)
+
+    # hardware counters are only collected for host back ends, with one launch per measurement to attribute them
+    if not backend.host:
+        perf_events = None
+
+    # sample in rounds of num_repeat until each point is converged or out of budget
+    samples = {point[0]: [] for point in points}
+    pending = points
+    while len(pending) > 0:
+        try:
+            records = run_points(bin_file, app, tpe, params, pending, num_repeat, env, sweep and perf_events is None, perf_events, prefix)
+        except subprocess.CalledProcessError as e:
+            # skipped instead of aborting the whole run, the binary reports the reason on stderr
+            if unsupported_exit_code != e.returncode:
+                raise
+            return [], [f'   ... {tpe} / {params} is not supported by {bin_file.name}, skipped']
+
+        for r in records:
+            samples[int(r['nx'])].append(r)
+
+        # later rounds reuse the calibrated number of iterations to keep samples comparable
+        pending = [(size, n_warm, int(samples[size][0]['nIt']), key) for size, n_warm, n_it, key in pending
+                   if not converged([r['time'] for r in samples[size]], rel_ci, max_repeat, time_budget)]
+
+    results, noisy = [], []
+    for size, n_warm, n_it, key in points:
+        stats = sample_stats([r['time'] for r in samples[size]])
+        best = min(samples[size], key=lambda r: r['time'])
+
+        results.append((key, {
+            'gpu': gpu_for_filename,
+            'device': slot['device'] if slot is not None else None,
+            'backend': backend.name,
+            'nx': size,
+            'ny': size if app.dimensionality > 1 else 1,
+            'nz': size if app.dimensionality > 2 else 1,
+            'nIt': int(best['nIt']),
+            'calibrated': 0 == n_it,
+            'nWarmUp': n_warm,
+            'type': tpe,
+            'numThreads': num_threads,
+            'procBind': affinity[1],
+            **dict(zip(app.additional_parameters, params)),
+            'time': best['time'],
+            'mlups': best['mlups'],
+            'bandwidth': best['bandwidth'],
+            'compute': best['compute'],
+            'timeMedian': stats['median'],
+            'timeMean': stats['mean'],
+            'timeStdDev': stats['stddev'],
+            'numSamples': stats['count'],
+            'noisy': stats['dispersion'] > rel_ci,
+            **{f'{k["kernel"]}{metric.title()}': k[metric] for k in best.get('kernels', []) for metric in ['time', 'bandwidth']},
+            **best.get('counters', {})
+        }))
+
+        if stats['dispersion'] > rel_ci:
+            noisy.append(f'   ... size {size} is noisy: {100 * stats["dispersion"]:.1f} % confidence interval of the median after {stats["count"]} samples')
+
+    return results, noisy
+
+
+def run_unit(slots, *args):
+    # takes a free resource for the duration of the measurement
+    slot = slots.get()
+    try:
+        return measure(*args, slot=slot)
+    finally:
+        slots.put(slot)
+
+
+def benchmark(machine, app, backends, gpu_for_filename, num_repeat=3, show_plot=False, export_xlsx=False, sweep=True, calibrate=False,
+              rel_ci=0.02, max_repeat=30, time_budget=10, perf_events=None, concurrent=False, threads=False, types=default_types):
+    print(f'Benchmarking {app.group}/{app.name} ...')
+
+    # read existing results, including those of an interrupted run still in the journal
+    df = measurements.compact(machine, app)
+
+    measured = measured_keys(app, df)
+
+    if concurrent:
+        all_slots = device_slots(machine)
+
+        slots = {}
+        for kind, kind_slots in all_slots.items():
+            slots[kind] = queue.Queue()
+            for slot in kind_slots:
+                slots[kind].put(slot)
 
-    last_save = time.time()
+    # thread scaling sweeps up to the cores of the smallest resource measurements may be pinned to
+    max_threads = None
+    if threads:
+        max_threads = min(slot['cores'] for slot in all_slots['host']) if concurrent else num_cores(os.sched_getaffinity(0))
 
+    # collect all sizes not measured yet, grouped to be measured together
+    #   concurrent measurements are split per size to be distributed over all devices
+    units = []
     for backend in backends:
-        measurements = []
-
-        def save_df():
-            nonlocal df, measurements
-            df = pd.concat([df, pd.DataFrame(measurements)], ignore_index=True)
-            measurements = []
-
-            nonlocal last_save
-            last_save = time.time()
-
-            df.to_csv(output_file)
-
-        for tpe in types:
-            print(f'  ... for {tpe} ...')
-
-            for params in params_to_bench:
-                print(f'   ... with {params} ...')
-
-                for (i, size) in enumerate(sizes_to_bench):
-                    print(f'\r   ... with {backend.name.ljust(30)} --- {round(100 * i / len(sizes_to_bench))}%', end='')
-
-                    num_cells = size**app.dimensionality
-                    n_warm = 2
-                    n_it = 2**(min(10, 1 + max(0, 46 - 2 * int(math.log2(num_cells)))))
-
-                    if 'flops' == app.metric: # overwrite n_warm and n_it for compute heavy benchmarks that feature hot inner loop
-                        n_warm = 2
-                        n_it = 8
-
-                    not_measured = df.loc[
-                        (df['gpu'] == gpu_for_filename) &
-                        (df['backend'] == backend.name) &
-                        (df['nx'] == size) &
-                        (df['ny'] == size if app.dimensionality > 1 else 1) &
-                        (df['nz'] == size if app.dimensionality > 2 else 1) &
-                        (df['nIt'] == n_it) &
-                        (df['nWarmUp'] == n_warm) &
-                        (df['type'] == tpe)
-                    ]
-                    for (param_name, param_value) in zip(app.additional_parameters, params):
-                        not_measured = not_measured.loc[(not_measured[param_name] == param_value)]
-                    not_measured = not_measured.empty
-
-                    if not_measured:
-                        local_results = []
-                        for _ in range(num_repeat):
-                            out = subprocess.check_output([backend.default_bin_dir(machine, app) / backend.default_bin_file(machine, app),
-                                                        tpe, *[f'{size}' for _ in range(app.dimensionality)],
-                                                        *[f'{param}' for param in params], f'{n_warm}', f'{n_it}'],
-                                                        env=env)
-                            out = out.decode("utf-8")
-
-                            elapsed = float(re.findall(r'elapsed time: *(\d+(?:\.\d+)?|\d+(?:\.\d+)?e-\d+) ms', out)[0])
-                            mlups = float(re.findall(r'MLUP/s: *(\d+(?:\.\d+)?|\d+(?:\.\d+)?e-\d+)\n', out)[0])
-                            bandwidth = float(re.findall(r'bandwidth: *(\d+(?:\.\d+)?|\d+(?:\.\d+)?e-\d+) GB/s', out)[0])
-                            compute = float(re.findall(r'compute: *(\d+(?:\.\d+)?|\d+(?:\.\d+)?e-\d+) GFLOP/s', out)[0])
-
-                            local_results.append([elapsed, mlups, bandwidth, compute])
-
-                        local_results.sort(key=lambda m: m[0])
-
-                        measurements.append({
-                            'gpu': gpu_for_filename,
-                            'backend': backend.name,
-                            'nx': size,
-                            'ny': size if app.dimensionality > 1 else 1,
-                            'nz': size if app.dimensionality > 2 else 1,
-                            'nIt': n_it,
-                            'nWarmUp': n_warm,
-                            'type': tpe,
-                            **dict(zip(app.additional_parameters, params)),
-                            'time': local_results[0][0],
-                            'mlups': local_results[0][1],
-                            'bandwidth': local_results[0][2],
-                            'compute': local_results[0][3]
-                        })
-
-                        if time.time() - last_save >= 120 and len(measurements) > 0:
-                            save_df()
-
-        print(f'\r   ... with {backend.name.ljust(30)} --- done')
-
-        df.sort_values(['gpu', 'backend', 'type', *app.additional_parameters, 'nz', 'ny', 'nx'], ascending=True, inplace=True)
-        df.reset_index(drop=True, inplace=True)
-
-        save_df()
-
-    print(f'Wrote results to \'{output_file}\'')
-
-    # write to file - xlsx
-    xlsx_file = output_file.with_suffix('.xlsx')
-    print(f'Wrote results to \'{xlsx_file}\'')
-
-    df.to_excel(xlsx_file)
+        for tpe in [tpe for tpe in types if tpe in backend.types]:
+            for params in app.params_to_bench():
+                for affinity in affinities(backend, max_threads):
+                    points = pending_points(app, backend, tpe, params, affinity, gpu_for_filename, measured, calibrate)
+
+                    if concurrent:
+                        units.extend((backend, tpe, params, affinity, [point]) for point in points)
+                    elif len(points) > 0:
+                        units.append((backend, tpe, params, affinity, points))
+
+    settings = [gpu_for_filename, num_repeat, sweep, rel_ci, max_repeat, time_budget, perf_events]
+
+    def store(results, noisy):
+        for key, measurement in results:
+            measurements.append(machine, app, measurement)
+            measured.add(key)
+
+        if len(noisy) > 0:
+            print('\n'.join(noisy))
+
+    if concurrent:
+        print(f'  ... {len(units)} measurements on {", ".join(f"{s.qsize()} {kind} slots" for kind, s in slots.items())}')
+
+        # one worker per slot, measurements only ever wait for a slot of their own kind
+        with ThreadPoolExecutor(slots['gpu'].qsize()) as gpu_pool, ThreadPoolExecutor(slots['host'].qsize()) as host_pool:
+            pools = {'gpu': gpu_pool, 'host': host_pool}
+            futures = {pools[roofline.device(backend)].submit(run_unit, slots[roofline.device(backend)], machine, app, backend, tpe, params, affinity, points, *settings):
+                           (backend, tpe, params, affinity, points) for backend, tpe, params, affinity, points in units}
+
+            for future in as_completed(futures):
+                backend, tpe, params, affinity, points = futures[future]
+                results, noisy = future.result()
+
+                status = f'on {results[0][1]["device"]} --- done' if len(results) > 0 else '--- skipped'
+                print(f'   ... {backend.name} / {tpe} / {params}{format_affinity(affinity)} / size {points[0][0]} {status}')
+                store(results, noisy)
+
+    else:
+        for backend, tpe, params, affinity, points in units:
+            print(f'   ... with {backend.name.ljust(30)} / {tpe} / {params}{format_affinity(affinity)} --- {len(points)} sizes', end='')
+            results, noisy = measure(machine, app, backend, tpe, params, affinity, points, *settings)
+            print(f'\r   ... with {backend.name.ljust(30)} / {tpe} / {params}{format_affinity(affinity)} --- done    ')
+            store(results, noisy)
+
+    measurements.compact(machine, app)
+
+    if export_xlsx:
+        measurements.export_xlsx(machine, app)
 
 def eval_gpu(machine):
     # evaluate GPU running on
@@ -169,17 +486,42 @@ def eval_gpu(machine):
     return gpu_for_filename
 
 if __name__ == '__main__':
-    if len(sys.argv) < 4:
-        print(f'Usage: python {sys.argv[0]} machine app backend')
+    # additionally export results as xlsx if --xlsx is given, calibrate the number of iterations if --calibrate is given
+    cla_xlsx = '--xlsx' in sys.argv
+    cla_calibrate = '--calibrate' in sys.argv
+
+    # run independent measurements concurrently, each pinned to its own GPU or NUMA domain, if --concurrent is given
+    cla_concurrent = '--concurrent' in sys.argv
+
+    # additionally measure thread scaling from one thread to all cores with close and spread binding for OpenMP based back ends if --threads is given
+    cla_threads = '--threads' in sys.argv
+
+    # collect hardware counters for host back ends if --perf or --perf=event,event,... is given
+    cla_perf = None
+    # measure other data types than double if --types=type,type,... is given, e.g. --types=double,float,half,bfloat16
+    cla_types = default_types
+    for a in sys.argv:
+        if '--perf' == a:
+            cla_perf = default_perf_events
+        elif a.startswith('--perf='):
+            cla_perf = a[len('--perf='):].split(',')
+        elif a.startswith('--types='):
+            cla_types = a[len('--types='):].split(',')
+
+    args = [a for a in sys.argv if a not in ['--xlsx', '--calibrate', '--concurrent', '--threads'] and not a.startswith('--perf') and not a.startswith('--types=')]
+
+    if len(args) < 4:
+        print(f'Usage: python {args[0]} machine app backend [--xlsx] [--calibrate] [--perf[=event,...]] [--concurrent] [--threads] [--types=type,...]')
         exit(1)
 
-    for cla_machine in sys.argv[1].split(','):          # 'nvidia.alex.a40'
+    for cla_machine in args[1].split(','):          # 'nvidia.alex.a40'
         gpu_for_filename = eval_gpu(cla_machine)
 
-        for cla_app in sys.argv[2].split(','):          # 'all'
-            for cla_backend in sys.argv[3].split(','):  # 'all'
+        for cla_app in args[2].split(','):          # 'all'
+            for cla_backend in args[3].split(','):  # 'all'
                 apps = get_default_apps()
                 backends = get_default_backends(cla_machine)
 
                 for app in apps[cla_app]:
-                    benchmark(cla_machine, app, backends[cla_backend], gpu_for_filename)
+                    benchmark(cla_machine, app, backends[cla_backend], gpu_for_filename, export_xlsx=cla_xlsx, calibrate=cla_calibrate,
+                              perf_events=cla_perf, concurrent=cla_concurrent, threads=cla_threads, types=cla_types)
@@ -0,0 +1,89 @@
+import subprocess
+import sys
+
+from apps import get_default_apps
+
+from backends import get_default_backends
+from platforms import platform
+
+from benchmark import default_env, run_points
+from compile import compile
+from generate import generate
+
+import roofline
+
+
+# back ends considered per device, the first one available on the machine is used
+calibration_backends = {
+    'gpu': ['cuda-expl', 'hip-expl', 'sycl-expl'],
+    'host': ['omp-host', 'base']
+}
+
+# apps measuring sustained bandwidth and compute
+calibration_apps = {
+    'bandwidth': ['stream', 'init'],
+    'compute': ['fma']
+}
+
+
+def calibration_backend(machine, device, backends):
+    for short_name in calibration_backends[device]:
+        if short_name in backends and platform(machine, backends[short_name][0].name)[0] is not None:
+            return backends[short_name][0]
+
+    return None
+
+
+def measure(machine, app, backend, tpe, metric, num_sizes=4, num_repeat=5):
+    # best result over the largest sizes, each with a calibrated number of iterations
+    bin_file = backend.default_bin_dir(machine, app) / backend.default_bin_file(machine, app)
+    points = [(size, 2, 0, None) for size in app.sizes_to_bench()[-num_sizes:]]
+
+    results = []
+    for params in app.params_to_bench():
+        results.extend(run_points(bin_file, app, tpe, params, points, num_repeat, default_env(), True))
+
+    return max(r[metric] for r in results)
+
+
+def calibrate(machine, types, apps, backends):
+    peaks = roofline.load_peaks(machine)
+
+    for device in calibration_backends:
+        backend = calibration_backend(machine, device, backends)
+        if backend is None:
+            print(f'No back end available to calibrate {device} peaks on {machine}')
+            continue
+
+        print(f'Calibrating {device} peaks with {backend.name} ...')
+
+        app_list = [apps[app_name][0] for app_names in calibration_apps.values() for app_name in app_names]
+        try:
+            for app in app_list:
+                generate(machine, app.name, backend.short_name, apps, backends)
+                compile(machine, app.name, backend.short_name, False, apps, backends)
+        except (subprocess.CalledProcessError, OSError):
+            print(f'Failed to build calibration apps for {device} peaks on {machine}')
+            continue
+
+        for tpe in [tpe for tpe in types if tpe in backend.types]:
+            peak = {metric: max(measure(machine, apps[app_name][0], backend, tpe, metric) for app_name in app_names)
+                    for metric, app_names in calibration_apps.items()}
+            peak['backend'] = backend.name
+
+            print(f'  ... {tpe}: {peak["bandwidth"]:.1f} GB/s, {peak["compute"]:.1f} GFLOP/s')
+
+            peaks.setdefault(device, {})[tpe] = peak
+
+    roofline.store_peaks(machine, peaks)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(f'Usage: python {sys.argv[0]} machine [types]')
+        exit(1)
+
+    cla_types = sys.argv[2].split(',') if len(sys.argv) > 2 else ['double', 'float']  # 'double,float'
+
+    for cla_machine in sys.argv[1].split(','):  # 'nvidia.alex.a40'
+        calibrate(cla_machine, cla_types, get_default_apps(), get_default_backends(cla_machine))
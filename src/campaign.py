@@ -0,0 +1,302 @@
+from pathlib import Path
+import json
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from apps import get_default_apps
+
+from backends import get_default_backends
+
+import benchmark
+import measurements
+import roofline
+
+
+def default_campaign_dir():
+    return Path('..') / 'campaigns'
+
+
+def default_files(name):
+    # job list written once when planning and journal of finished jobs the workers append to
+    plan_file = default_campaign_dir() / f'{name}.json'
+
+    return plan_file, plan_file.with_suffix('.jsonl')
+
+
+# GPU of the measurements a plan compares against - the GPU is only known on the node running the jobs of a machine
+any_gpu = 'any'
+
+
+def history_key(job):
+    return job['machine'], job['app'], job['backend'], job['type'], job['numThreads'], job['procBind'], job['size']
+
+
+def plan(name, machines, app_names, backend_names, priorities={}, budget=None, calibrate=False, threads=False, types=benchmark.default_types,
+         num_repeat=3, rel_ci=0.02, max_repeat=30, time_budget=10, perf_events=None):
+    # expands all points not measured yet - priorities are summed over the matching machine, app, back end and type names
+    plan_file, journal_file = default_files(name)
+    if plan_file.is_file():
+        print(f'Campaign \'{name}\' already exists, resume it with run or remove \'{plan_file}\' first')
+        return None
+
+    # thread scaling sweeps up to the cores available to the planning process
+    max_threads = benchmark.num_cores(os.sched_getaffinity(0)) if threads else None
+
+    jobs = []
+    for machine in machines:
+        backends = get_default_backends(machine)
+
+        for app in dict.fromkeys(app for app_name in app_names for app in get_default_apps()[app_name]):
+            measured = {(any_gpu, *key[1:]) for key in benchmark.measured_keys(app, measurements.compact(machine, app))}
+
+            for backend in dict.fromkeys(backend for backend_name in backend_names for backend in backends[backend_name]):
+                for tpe in [tpe for tpe in types if tpe in backend.types]:
+                    for params in app.params_to_bench():
+                        for affinity in benchmark.affinities(backend, max_threads):
+                            for size, n_warm, n_it, _ in benchmark.pending_points(app, backend, tpe, params, affinity, any_gpu, measured, calibrate):
+                                jobs.append({
+                                    'id': len(jobs),
+                                    'machine': machine,
+                                    'app': app.name,
+                                    'backend': backend.short_name,
+                                    'type': tpe,
+                                    'params': params,
+                                    'numThreads': affinity[0],
+                                    'procBind': affinity[1],
+                                    'size': size,
+                                    'nWarmUp': n_warm,
+                                    'nIt': n_it,
+                                    'priority': sum(priorities.get(n, 0) for n in [machine, app.name, backend.short_name, tpe])
+                                })
+
+    campaign = {
+        'budget': budget,
+        'calibrate': calibrate,
+        'settings': {'num_repeat': num_repeat, 'rel_ci': rel_ci, 'max_repeat': max_repeat, 'time_budget': time_budget, 'perf_events': perf_events},
+        'jobs': jobs
+    }
+
+    plan_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = plan_file.with_suffix('.json.tmp')
+    tmp_file.write_text(json.dumps(campaign, indent=1) + '\n')
+    os.replace(tmp_file, plan_file)
+    journal_file.unlink(missing_ok=True)
+
+    print(f'Planned {len(jobs)} jobs in \'{plan_file}\'')
+
+    return campaign
+
+
+def load(name):
+    plan_file, journal_file = default_files(name)
+
+    return json.loads(plan_file.read_text()), measurements.read_journal(journal_file)
+
+
+def history():
+    # wall time in seconds of all finished jobs of all campaigns
+    walls = {}
+    for journal_file in default_campaign_dir().glob('*.jsonl'):
+        for record in measurements.read_journal(journal_file):
+            walls.setdefault(history_key(record), []).append(record['wall'])
+
+    return {key: statistics.mean(w) for key, w in walls.items()}
+
+
+def estimate(job, walls):
+    # mean of previous runs of the same point, otherwise of the same machine, app, back end and type - None if never run
+    if history_key(job) in walls:
+        return walls[history_key(job)]
+
+    similar = [w for key, w in walls.items() if key[:4] == history_key(job)[:4]]
+    return statistics.mean(similar) if len(similar) > 0 else None
+
+
+def format_duration(seconds):
+    if seconds < 60:
+        return f'{seconds:.0f}s'
+
+    minutes = int(seconds / 60)
+    return f'{minutes // 60}h{minutes % 60:02d}m' if minutes >= 60 else f'{minutes}m{int(seconds) % 60:02d}s'
+
+
+def format_eta(jobs, walls):
+    estimates = [estimate(job, walls) for job in jobs]
+    known = [e for e in estimates if e is not None]
+
+    eta = format_duration(sum(known))
+    if len(known) < len(estimates):
+        eta += f' (+ {len(estimates) - len(known)} jobs without history)'
+
+    return eta
+
+
+def pending_jobs(campaign, done):
+    # highest priority first, in planning order otherwise
+    finished = {record['id'] for record in done}
+
+    return sorted([job for job in campaign['jobs'] if job['id'] not in finished], key=lambda job: -job['priority'])
+
+
+def status(name):
+    campaign, done = load(name)
+    pending = pending_jobs(campaign, done)
+    elapsed = max([record['elapsed'] for record in done], default=0)
+
+    print(f'Campaign \'{name}\': {len(done)} of {len(campaign["jobs"])} jobs done in {format_duration(elapsed)}, '
+          f'{len(pending)} pending, ETA {format_eta(pending, history())}')
+    if campaign['budget'] is not None:
+        print(f'  ... {format_duration(max(0, campaign["budget"] - elapsed))} of {format_duration(campaign["budget"])} budget left')
+
+
+def run(name, machine, concurrent=False):
+    # runs the pending jobs of the given machine, which has to be the one of the node running them
+    campaign, done = load(name)
+    _, journal_file = default_files(name)
+
+    jobs = [job for job in campaign['jobs'] if job['machine'] == machine]
+    pending = [job for job in pending_jobs(campaign, done) if job['machine'] == machine]
+    walls = history()
+
+    # the budget covers the wall time of all sessions of the campaign
+    elapsed_before = max([record['elapsed'] for record in done], default=0)
+    start = time.perf_counter()
+    budget = campaign['budget']
+
+    def elapsed():
+        return elapsed_before + time.perf_counter() - start
+
+    print(f'Running campaign \'{name}\': {len(pending)} of {len(jobs)} jobs pending, ETA {format_eta(pending, walls)}')
+
+    if len(pending) == 0:
+        return
+
+    apps = get_default_apps()
+    backends = get_default_backends(machine)
+    gpu_for_filename = benchmark.eval_gpu(machine)
+
+    # a crash between storing a measurement and finishing its job would otherwise measure the point twice
+    measured = {}
+    for app_name in {job['app'] for job in jobs}:
+        measured[app_name] = benchmark.measured_keys(apps[app_name][0], measurements.load(machine, apps[app_name][0]))
+
+    # concurrent jobs are pinned to the resources of the machine running them
+    if concurrent:
+        all_slots = benchmark.device_slots(machine)
+    else:
+        all_slots = {kind: [{'device': None, 'env': {}, 'prefix': []}] for kind in ['gpu', 'host']}
+
+    slots = {}
+    for kind, kind_slots in all_slots.items():
+        slots[kind] = queue.Queue()
+        for slot in kind_slots:
+            slots[kind].put(slot)
+
+    settings = campaign['settings']
+    lock = threading.Lock()
+    skipped = []
+
+    def work(job, app, backend):
+        # jobs expected to exceed the remaining budget are left for a later session
+        if budget is not None and elapsed() + (estimate(job, walls) or 0) > budget:
+            skipped.append(job)
+            return None
+
+        job_start = time.perf_counter()
+        key = benchmark.measurement_key(gpu_for_filename, backend.name,
+                                        job['size'], job['size'] if app.dimensionality > 1 else 1, job['size'] if app.dimensionality > 2 else 1,
+                                        job['nIt'], job['nWarmUp'], job['type'], job['numThreads'], job['procBind'], job['params'])
+        results, noisy = [], []
+        if key not in measured[job['app']]:
+            results, noisy = benchmark.run_unit(slots[roofline.device(backend)], machine, app, backend, job['type'], job['params'],
+                                                (job['numThreads'], job['procBind']), [(job['size'], job['nWarmUp'], job['nIt'], key)], gpu_for_filename, settings['num_repeat'], True,
+                                                settings['rel_ci'], settings['max_repeat'], settings['time_budget'], settings['perf_events'])
+
+        with lock:
+            for _, measurement in results:
+                measurements.append(machine, app, measurement)
+
+            # the job is finished only once its measurement is stored
+            record = {'id': job['id'], 'machine': job['machine'], 'app': job['app'], 'backend': job['backend'], 'type': job['type'],
+                      'numThreads': job['numThreads'], 'procBind': job['procBind'], 'size': job['size'], 'wall': time.perf_counter() - job_start, 'elapsed': elapsed()}
+            with open(journal_file, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            done.append(record)
+
+        return noisy
+
+    # one worker per slot if concurrent, a single worker otherwise - jobs are started in priority order
+    num_workers = {kind: s.qsize() for kind, s in slots.items()} if concurrent else {'gpu': 1, 'host': 1}
+    with ThreadPoolExecutor(num_workers['gpu']) as gpu_pool, ThreadPoolExecutor(num_workers['host']) as host_pool:
+        pools = {'gpu': gpu_pool, 'host': host_pool if concurrent else gpu_pool}
+
+        futures = {}
+        for job in pending:
+            app, backend = apps[job['app']][0], backends[job['backend']][0]
+            futures[pools[roofline.device(backend)].submit(work, job, app, backend)] = job
+
+        try:
+            for future in as_completed(futures):
+                job = futures[future]
+                noisy = future.result()
+                if noisy is None:
+                    continue
+
+                remaining = [job for job in pending_jobs(campaign, done) if job['machine'] == machine]
+                print(f'   ... {job["app"]} / {job["backend"]} / {job["type"]} / {job["params"]}{benchmark.format_affinity((job["numThreads"], job["procBind"]))} / size {job["size"]} --- done, '
+                      f'{len(remaining)} jobs pending, ETA {format_eta(remaining, walls)}')
+                if len(noisy) > 0:
+                    print('\n'.join(noisy))
+        finally:
+            # on interruption, only the jobs already running are finished
+            for future in futures:
+                future.cancel()
+
+    for app_name in measured:
+        measurements.compact(machine, apps[app_name][0])
+
+    if len(skipped) > 0:
+        print(f'Stopped campaign \'{name}\' with {len(skipped)} jobs left after {format_duration(elapsed())} of {format_duration(budget)} budget')
+
+
+if __name__ == '__main__':
+    # plan a campaign with a total time budget in seconds if --budget=... is given and
+    #   prioritized machines, apps, back ends or types if --priority=name:priority,... is given
+    #   including thread scaling sweeps for OpenMP based back ends if --threads is given
+    #   and other data types than double if --types=type,type,... is given
+    # run pending jobs pinned to individual GPUs or NUMA domains if --concurrent is given
+    cla_budget = None
+    cla_priorities = {}
+    cla_types = benchmark.default_types
+    for a in sys.argv:
+        if a.startswith('--budget='):
+            cla_budget = float(a[len('--budget='):])
+        elif a.startswith('--priority='):
+            cla_priorities = {n: float(p) for n, p in (e.split(':') for e in a[len('--priority='):].split(','))}
+        elif a.startswith('--types='):
+            cla_types = a[len('--types='):].split(',')
+
+    cla_calibrate = '--calibrate' in sys.argv
+    cla_threads = '--threads' in sys.argv
+    cla_concurrent = '--concurrent' in sys.argv
+
+    args = [a for a in sys.argv if a not in ['--calibrate', '--threads', '--concurrent'] and not a.startswith(('--budget=', '--priority=', '--types='))]
+
+    if len(args) >= 6 and 'plan' == args[1]:
+        plan(args[2], args[3].split(','), args[4].split(','), args[5].split(','), cla_priorities, cla_budget, cla_calibrate, cla_threads, cla_types)
+    elif len(args) >= 4 and 'run' == args[1]:
+        run(args[2], args[3], cla_concurrent)
+    elif len(args) >= 3 and 'status' == args[1]:
+        status(args[2])
+    else:
+        print(f'Usage: python {args[0]} plan name machine app backend [--budget=seconds] [--priority=name:priority,...] [--calibrate] [--threads] [--types=type,...]')
+        print(f'       python {args[0]} run name machine [--concurrent]')
+        print(f'       python {args[0]} status name')
+        exit(1)
@@ -4,9 +4,10 @@ from threading import Thread
 from apps import get_default_apps
 
 from backends import get_default_backends
+from compile_cache import CompileCache
 
 
-def compile(cla_machine, cla_app, cla_backend, cla_parallel, apps, backends):
+def compile(cla_machine, cla_app, cla_backend, cla_parallel, apps, backends, force=False):
     threads = []
 
     for app in apps[cla_app]:
@@ -16,30 +17,37 @@ def compile(cla_machine, cla_app, cla_backend, cla_parallel, apps, backends):
             print(f'  ... with {backend.__name__}')
 
             if cla_parallel:
-                thread = Thread(target=backend.compile_bin, args=[cla_machine, app])
+                thread = Thread(target=backend.compile_bin, args=[cla_machine, app, force])
                 thread.start()
                 threads.append(thread)
             else:
-                backend.compile_bin(cla_machine, app)
+                backend.compile_bin(cla_machine, app, force)
 
     for thread in threads:
         thread.join()
 
+    if CompileCache.enabled:
+        CompileCache.report()
+
     print('Finished compiling')
     print()
 
 
 if __name__ == '__main__':
-    if len(sys.argv) < 5:
-        print(f'Usage: python {sys.argv[0]} machine app backend parallel')
+    # rebuild all binaries regardless of their fingerprints if --force is given
+    cla_force = '--force' in sys.argv
+    args = [a for a in sys.argv if '--force' != a]
+
+    if len(args) < 5:
+        print(f'Usage: python {args[0]} machine app backend parallel [--force]')
         exit(1)
 
-    cla_parallel = sys.argv[4].lower() in ['true', '1', 'on']
+    cla_parallel = args[4].lower() in ['true', '1', 'on']
 
-    for cla_machine in sys.argv[1].split(','):          # 'nvidia.alex.a40'
-        for cla_app in sys.argv[2].split(','):          # 'all'
-            for cla_backend in sys.argv[3].split(','):  # 'all'
+    for cla_machine in args[1].split(','):          # 'nvidia.alex.a40'
+        for cla_app in args[2].split(','):          # 'all'
+            for cla_backend in args[3].split(','):  # 'all'
                 apps = get_default_apps()
                 backends = get_default_backends(cla_machine)
 
-                compile(cla_machine, cla_app, cla_backend, cla_parallel, apps, backends)
+                compile(cla_machine, cla_app, cla_backend, cla_parallel, apps, backends, cla_force)
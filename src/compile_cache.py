@@ -0,0 +1,124 @@
+from pathlib import Path
+import subprocess
+import threading
+import hashlib
+import shutil
+import json
+import re
+import os
+
+
+class CompileCache:
+    '''Content-addressed cache of compiled binaries, shared across machines and branches'''
+
+    enabled = True
+    max_size = 2 * 1024 ** 3  # in bytes, least recently used entries are evicted beyond that
+
+    lock = threading.Lock()
+    hits = 0
+    misses = 0
+
+    compiler_versions = {}
+
+    @staticmethod
+    def default_cache_dir():
+        return Path('..') / 'build' / '.cache'
+
+    @classmethod
+    def entry(cls, key):
+        return cls.default_cache_dir() / key[:2] / key
+
+    @classmethod
+    def compiler_version(cls, compiler):
+        if compiler not in cls.compiler_versions:
+            try:
+                version = subprocess.run([compiler, '--version'], capture_output=True).stdout
+            except OSError:
+                version = b''
+            cls.compiler_versions[compiler] = f'{shutil.which(compiler)}'.encode() + version
+
+        return cls.compiler_versions[compiler]
+
+    @staticmethod
+    def preprocessed_source(compiler, flags, code_file, dependencies):
+        # None if the compiler can not be run at all, e.g. it is not installed - the binary is then compiled without the cache
+        try:
+            result = subprocess.run([compiler, *flags, '-E', code_file], capture_output=True)
+        except OSError:
+            return None
+
+        if 0 == result.returncode:
+            # line markers contain the (machine specific) path of the code file and would prevent sharing entries
+            return re.sub(rb'^#(line)? \d+ .*$', b'', result.stdout, flags=re.MULTILINE)
+
+        # fall back to the direct inputs if the compiler does not support preprocessing with the given flags
+        return b''.join(d.read_bytes() for d in dependencies)
+
+    @classmethod
+    def key(cls, compiler, flags, libs, code_file, dependencies):
+        # None if the binary can not be cached
+        source = cls.preprocessed_source(compiler, flags, code_file, dependencies)
+        if source is None:
+            return None
+
+        key = hashlib.sha256()
+        key.update(cls.compiler_version(compiler))
+        key.update(' '.join([compiler, *flags, '|', *libs]).encode())
+        key.update(source)
+
+        return key.hexdigest()
+
+    @classmethod
+    def restore(cls, key, bin_file):
+        entry = cls.entry(key)
+
+        with cls.lock:
+            if not entry.is_file():
+                cls.misses += 1
+                return False
+
+            shutil.copy(entry, bin_file)
+            os.utime(entry)  # mark as recently used
+
+            cls.hits += 1
+            return True
+
+    @classmethod
+    def store(cls, key, bin_file):
+        entry = cls.entry(key)
+
+        with cls.lock:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+
+            tmp_file = entry.with_name(f'{entry.name}.tmp')
+            shutil.copy(bin_file, tmp_file)
+            os.replace(tmp_file, entry)
+
+            cls.evict()
+
+    @classmethod
+    def evict(cls):
+        entries = [(e.stat().st_mtime, e.stat().st_size, e) for e in cls.default_cache_dir().glob('*/*') if e.is_file()]
+        total_size = sum(e[1] for e in entries)
+
+        for _, size, e in sorted(entries, key=lambda e: e[0]):
+            if total_size <= cls.max_size:
+                break
+            e.unlink()
+            total_size -= size
+
+    @classmethod
+    def report(cls):
+        stats_file = cls.default_cache_dir() / 'stats.json'
+
+        with cls.lock:
+            stats = json.loads(stats_file.read_text()) if stats_file.is_file() else {'hits': 0, 'misses': 0}
+            stats['hits'] += cls.hits
+            stats['misses'] += cls.misses
+
+            stats_file.parent.mkdir(parents=True, exist_ok=True)
+            stats_file.write_text(json.dumps(stats))
+
+            print(f'Compile cache: {cls.hits} hits, {cls.misses} misses in this run ({stats["hits"]} hits, {stats["misses"]} misses in total)')
+
+            cls.hits, cls.misses = 0, 0
@@ -10,19 +10,22 @@ from generate import generate
 
 
 if __name__ == '__main__':
-    if len(sys.argv) < 5:
-        print(f'Usage: python {sys.argv[0]} machine app backend parallel')
+    cla_force = '--force' in sys.argv
+    args = [a for a in sys.argv if '--force' != a]
+
+    if len(args) < 5:
+        print(f'Usage: python {args[0]} machine app backend parallel [--force]')
         exit(1)
 
-    cla_machine = sys.argv[1]  # 'nvidia.alex.a40'
-    cla_app = sys.argv[2]      # 'all'
-    cla_backend = sys.argv[3]  # 'all'
+    cla_machine = args[1]  # 'nvidia.alex.a40'
+    cla_app = args[2]      # 'all'
+    cla_backend = args[3]  # 'all'
 
-    cla_parallel = sys.argv[4].lower() in ['true', '1', 'on']
+    cla_parallel = args[4].lower() in ['true', '1', 'on']
 
     apps = get_default_apps()
     backends = get_default_backends(cla_machine)
 
-    generate(cla_machine, cla_app, cla_backend, apps, backends)
-    compile(cla_machine, cla_app, cla_backend, cla_parallel, apps, backends)
+    generate(cla_machine, cla_app, cla_backend, apps, backends, cla_parallel)
+    compile(cla_machine, cla_app, cla_backend, cla_parallel, apps, backends, cla_force)
     execute(cla_machine, cla_app, cla_backend, apps, backends)
@@ -1,43 +1,179 @@
+import os
 import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from apps import get_default_apps
 
 from backends import get_default_backends
+from backend.backend import Backend
 from backend.makefile import Makefile
+from backend.ninja import Ninja
 from backend.util_header import UtilHeader
 
 
-def generate(cla_machine, cla_app, cla_backend, apps, backends):
-    for app in apps[cla_app]:
-        print(f'Generating {app.group}/{app.name} ...')
+def generate_code(cla_machine, app, backend, backends):
+    # writes the staging file only - returns it together with the information whether it needs formatting
+    if UtilHeader == backend:
+        output_file = UtilHeader.print_code_file(cla_machine, app, app.compose_app(UtilHeader).generate(), defer=True)
+    elif Makefile == backend:
+        return Makefile.print_code_file(cla_machine, app, Makefile.generate(cla_machine, app, backends['all']), format=False, defer=True), False
+    else:
+        application = app.compose_app(backend)
+        application.tune(Backend.load_tuning(cla_machine).get(app.name, {}))
+        output_file = backend.print_code_file(cla_machine, app, application.generate(), defer=True)
+
+    return output_file, True
 
-        print(f'  ... for {UtilHeader.__name__}')
 
-        UtilHeader.print_code_file(cla_machine, app, app.compose_app(UtilHeader).generate())
+def generate_unit(cla_machine, app, backend, backends):
+    # independent unit of work for the process pool - never raises, errors are reported back to the caller
+    start = time.perf_counter()
+    try:
+        output_file, format = generate_code(cla_machine, app, backend, backends)
+        error = None
+    except Exception:
+        output_file, format = None, False
+        error = traceback.format_exc()
 
-        print(f'  ... for {Makefile.__name__}')
+    return {
+        'machine': cla_machine,
+        'app': app.name,
+        'backend': backend.__name__,
+        'time': time.perf_counter() - start,
+        'error': error,
+        'output_file': output_file,
+        'format': format
+    }
 
-        Makefile.print_code_file(cla_machine, app, Makefile.generate(cla_machine, app, backends['all']), format=False)
 
+def generation_units(cla_machine, cla_app, cla_backend, apps, backends):
+    units = []
+    for app in apps[cla_app]:
+        units.append((cla_machine, app, UtilHeader, backends))
+        units.append((cla_machine, app, Makefile, backends))
         for backend in backends[cla_backend]:
+            units.append((cla_machine, app, backend, backends))
+
+    return units
+
+
+def finalize_code_files(output_files, to_format, num_procs=1):
+    # format all staged files in one batch and move changed ones to their final location
+    format_time = Backend.format_code_files([Backend.staging_file(f) for f in to_format], num_procs)
+
+    output_files = list(dict.fromkeys(output_files))
+    num_written = sum(Backend.update_code_file(f) for f in output_files)
+
+    print(f'Wrote {num_written} files, {len(output_files) - num_written} files unchanged')
+
+    return format_time, num_written, len(output_files) - num_written
+
+
+def generate_build_graph():
+    # covers everything generated so far, including previous runs for other machines
+    print(f'Generating {Ninja.__name__} build graph ...')
+
+    Ninja.print_code_file(None, None, Ninja.generate(Ninja.generated_targets()), format=False)
+
+
+def generate(cla_machine, cla_app, cla_backend, apps, backends, parallel=False):
+    if parallel:
+        generate_parallel(generation_units(cla_machine, cla_app, cla_backend, apps, backends))
+        return
+
+    output_files, to_format = [], []
+
+    for app in apps[cla_app]:
+        print(f'Generating {app.group}/{app.name} ...')
+
+        for backend in [UtilHeader, Makefile, *backends[cla_backend]]:
             print(f'  ... for {backend.__name__}')
 
-            code = app.compose_app(backend).generate()
+            output_file, format = generate_code(cla_machine, app, backend, backends)
+            output_files.append(output_file)
+            if format:
+                to_format.append(output_file)
 
-            backend.print_code_file(cla_machine, app, code)
+    finalize_code_files(output_files, to_format)
+
+    generate_build_graph()
+
+    print('Finished generating')
+    print()
+
+
+def generate_parallel(units, num_workers=None):
+    # several back ends may share a code file (e.g. all Kokkos variants) - only one unit per output file must write it
+    unique_units = {}
+    for unit in units:
+        cla_machine, app, backend, _ = unit
+        unique_units.setdefault(backend.default_code_dir(cla_machine, app) / backend.default_code_file(cla_machine, app), unit)
+    units = list(unique_units.values())
+
+    print(f'Generating {len(units)} units in parallel ...')
+
+    start = time.perf_counter()
+    results = []
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [executor.submit(generate_unit, *unit) for unit in units]
+        for future in as_completed(futures):
+            results.append(future.result())
+
+    generate_time = time.perf_counter() - start
+
+    succeeded = [r for r in results if r['error'] is None]
+    format_time, num_written, num_unchanged = finalize_code_files([r['output_file'] for r in succeeded],
+                                                                  [r['output_file'] for r in succeeded if r['format']],
+                                                                  num_procs=num_workers or os.cpu_count())
+
+    generate_build_graph()
+
+    results.sort(key=lambda r: (r['machine'], r['app'], r['backend']))
+    failed = [r for r in results if r['error'] is not None]
+
+    print('Generation summary')
+    for r in results:
+        print(f'  {r["machine"]} / {r["app"]} / {r["backend"].ljust(20)} {1e3 * r["time"]:10.1f} ms' + (' --- FAILED' if r['error'] is not None else ''))
+    print(f'  {len(results) - len(failed)} succeeded, {len(failed)} failed')
+    print(f'  wall time {generate_time:.2f} s, accumulated unit time {sum(r["time"] for r in results):.2f} s')
+    print(f'  formatting time {format_time:.2f} s')
+    print(f'  {num_written} files written, {num_unchanged} files unchanged')
+
+    for r in failed:
+        print()
+        print(f'Failed to generate {r["app"]} for {r["backend"]} on {r["machine"]}:')
+        print(r['error'])
 
     print('Finished generating')
     print()
 
+    return results
+
+
 if __name__ == '__main__':
     if len(sys.argv) < 4:
-        print(f'Usage: python {sys.argv[0]} machine app backend')
+        print(f'Usage: python {sys.argv[0]} machine app backend [parallel]')
         exit(1)
 
+    cla_parallel = len(sys.argv) > 4 and sys.argv[4].lower() in ['true', '1', 'on']
+
+    units = []
+
     for cla_machine in sys.argv[1].split(','):          # 'nvidia.alex.a40'
         for cla_app in sys.argv[2].split(','):          # 'all'
             for cla_backend in sys.argv[3].split(','):  # 'all'
                 apps = get_default_apps()
                 backends = get_default_backends(cla_machine)
 
-                generate(cla_machine, cla_app, cla_backend, apps, backends)
+                if cla_parallel:  # collect units of all machines first to share one process pool
+                    units.extend(generation_units(cla_machine, cla_app, cla_backend, apps, backends))
+                else:
+                    generate(cla_machine, cla_app, cla_backend, apps, backends)
+
+    if cla_parallel:
+        results = generate_parallel(units)
+        if any(r['error'] is not None for r in results):
+            exit(1)
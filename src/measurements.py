@@ -0,0 +1,107 @@
+import json
+import os
+
+import pandas as pd
+
+from backend.backend import Backend
+
+import roofline
+
+
+def default_columns(app):
+    return ['gpu', 'device', 'backend', 'nx', 'ny', 'nz', 'nIt', 'calibrated', 'nWarmUp', 'type', 'numThreads', 'procBind', *app.additional_parameters,
+            'time', 'mlups', 'bandwidth', 'compute',
+            'timeMedian', 'timeMean', 'timeStdDev', 'numSamples', 'noisy',
+            'intensity', 'percentOfPeakBandwidth', 'percentOfPeakCompute', 'percentOfRoofline']
+
+
+def default_files(machine, app):
+    # canonical csv file and journal of measurements that have not been compacted into it yet
+    output_file = Backend.default_measurement_dir(machine, app) / Backend.default_measurement_file(machine, app)
+
+    return output_file, output_file.with_suffix('.jsonl')
+
+
+def read_journal(journal_file):
+    records = []
+
+    if journal_file.is_file():
+        with open(journal_file) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    pass  # incomplete record of an interrupted run
+
+    return records
+
+
+def load(machine, app):
+    output_file, journal_file = default_files(machine, app)
+    columns = default_columns(app)
+
+    if output_file.is_file():
+        # files written before columns were added are padded with empty values
+        df = pd.read_csv(output_file, header=0, index_col=0)
+        df = df.reindex(columns=[*columns, *[c for c in df.columns if c not in columns]])
+        # measured with the default number of threads and binding, and the default values of parameters added later
+        defaults = dict(zip(app.additional_parameters, app.default_parameters[1 + app.dimensionality: -2]))
+        df = df.fillna({'numThreads': 0, 'procBind': 'close', **defaults})
+        # padded columns are read as floats, e.g. num_steps 1.0, which would be written back as such
+        df = df.astype({'numThreads': int, **{p: type(v) for p, v in defaults.items()}})
+    else:  # output file doesn't exist already -> prepare new data frame
+        df = pd.DataFrame(columns=columns)
+
+    records = read_journal(journal_file)
+    if len(records) > 0:
+        df = pd.concat([df, pd.DataFrame(records)], ignore_index=True)
+
+    return df
+
+
+def append(machine, app, measurement):
+    # one line per record, synced to disk before returning - at most the record being written is lost on a crash
+    _, journal_file = default_files(machine, app)
+    journal_file.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(journal_file, 'a') as f:
+        f.write(json.dumps(measurement) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def compact(machine, app):
+    # merge the journal into the csv file - the csv file is replaced atomically before the journal is removed
+    output_file, journal_file = default_files(machine, app)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+
+    df = load(machine, app)
+    if not journal_file.is_file() and output_file.is_file():
+        return df
+
+    # derived columns are refreshed with the current machine peaks
+    df = roofline.annotate(machine, app, df)
+
+    df.sort_values(['gpu', 'backend', 'type', *app.additional_parameters, 'procBind', 'numThreads', 'nz', 'ny', 'nx'], ascending=True, inplace=True)
+    df.reset_index(drop=True, inplace=True)
+
+    tmp_file = output_file.with_suffix('.csv.tmp')
+    df.to_csv(tmp_file)
+    with open(tmp_file) as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_file, output_file)
+
+    journal_file.unlink(missing_ok=True)
+
+    print(f'Wrote results to \'{output_file}\'')
+
+    return df
+
+
+def export_xlsx(machine, app):
+    output_file, _ = default_files(machine, app)
+    xlsx_file = output_file.with_suffix('.xlsx')
+
+    load(machine, app).to_excel(xlsx_file)
+
+    print(f'Wrote results to \'{xlsx_file}\'')
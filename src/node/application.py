@@ -23,11 +23,55 @@ class AbstractApplication:
         else:
             self.kernels = [kernels]
 
+        if backend.genFusedKernels:
+            self.kernels = self.fuseKernels(self.kernels)
+
+        # time steps per iteration, e.g. several sweeps of a stencil - each cell is counted once per step
+        self.steps_per_it = 1
+
         self.fields = sorted({f for k in self.kernels for f in k.reads + k.writes}, key=lambda f: f.name)
 
     def generate(self):
         pass
 
+    def tune(self, tuning):
+        # settings tuned for the app, e.g. loaded with Backend.load_tuning - kernels keep their defaults otherwise
+        for kernel in self.kernels:
+            if not isinstance(kernel, PseudoKernel):
+                kernel.tune(tuning)
+
+    @staticmethod
+    def fusible(first, second):
+        # same iteration space and fields shared between both kernels are only accessed pointwise, i.e. each thread only
+        #   depends on its own point
+        if isinstance(first, PseudoKernel) or isinstance(second, PseudoKernel):
+            return False
+        if 0 == len(first.it_space) or f'{first.it_space}' != f'{second.it_space}' or first.has_tpe_template != second.has_tpe_template:
+            return False
+
+        shared = [f for f in first.writes if f in second.reads + second.writes] + [f for f in first.reads if f in second.writes]
+
+        return all(first.isPointwise(f) and second.isPointwise(f) for f in shared)
+
+    def fuseKernels(self, kernels):
+        # merges adjacent fusible kernels into one - fields written by the first kernel are still read by the fused kernel, but
+        #   no longer from memory
+        fused = []
+        for kernel in kernels:
+            if len(fused) > 0 and self.fusible(fused[-1], kernel):
+                first, second = fused.pop(), kernel
+                kernel = self.backend.Kernel(f'{first.name}-{second.name}',
+                                             list(dict.fromkeys(first.variables + second.variables)),
+                                             first.reads + [f for f in second.reads if f not in first.reads],
+                                             first.writes + [f for f in second.writes if f not in first.writes],
+                                             first.it_space,
+                                             f'{"{"}{newline}{first.body}{newline}{"}"}{newline}{"{"}{newline}{second.body}{newline}{"}"}',
+                                             first.has_tpe_template, first.num_flop + second.num_flop)
+                kernel.memory_reads = first.memory_reads + [f for f in second.memory_reads if f not in first.memory_reads + first.writes]
+            fused.append(kernel)
+
+        return fused
+
     def kernelDecls(self):
         return newline.join(kernel.generate() for kernel in self.kernels if not isinstance(kernel, PseudoKernel))
 
@@ -43,6 +87,16 @@ class AbstractApplication:
 
         return (code_device + 2 * newline if 0 != len(code_device) else '') + code
 
+    def kernelSetUps(self):
+        code = [c for c in (k.setUp() for k in self.kernels if not isinstance(k, PseudoKernel)) if c is not None]
+
+        return newline.join(code) + 2 * newline if len(code) > 0 else ''
+
+    def kernelTearDowns(self):
+        code = [c for c in (k.tearDown() for k in self.kernels if not isinstance(k, PseudoKernel)) if c is not None]
+
+        return newline.join(code) + 2 * newline if len(code) > 0 else ''
+
     def toDeviceCopies(self):
         copies = [f.copyToDevice() for f in self.fields]
         code = newline.join([c for c in copies if c is not None])
@@ -73,51 +127,120 @@ class AbstractApplication:
             f'template<typename tpe>{newline}' + \
             f'inline int realMain(int argc, char *argv[]) {"{"}{newline}' + \
             f'char* tpeName;{newline}' + \
-            f'size_t {size_list}, nItWarmUp, nIt;{newline}' + \
+            f'size_t {size_list}, nItWarmUp, nIt, nItCalibration;{newline}' + \
             param_decls + \
             f'parseCLA_{len(self.sizes)}d(argc, argv, tpeName, {size_list}{param_list}, nItWarmUp, nIt);{newline}'
 
     def mainAllocateAndInit(self):
+        return \
+            self.fieldAllocates() + newline + \
+            newline + \
+            self.kernelSetUps() + \
+            self.mainInit()
+
+    def mainInit(self):
         size_list = ', '.join(f'{s}' for s in self.sizes)
         field_list = ', '.join(f.name for f in self.fields) + (', ' if len(self.fields) > 0 else '')
         
         param_list = ', ' + ', '.join(f'{p}' for p in self.parameters) if len(self.parameters) > 0 else ''
 
         return \
-            self.fieldAllocates() + newline + \
-            newline + \
             f'// init{newline}' + \
             f'init{self.app.title().replace("-", "")}<tpe>({field_list}{size_list}{param_list});{newline}' + \
             self.toDeviceCopies()
 
     def mainMiddle(self):
-        total_size = f'{math.prod(self.sizes)}'
-
-        num_flop = sum(k.num_flop for k in self.kernels)
-        num_byte = ' + '.join(f'sizeof({f.tpe})' for k in self.kernels for f in k.reads + k.writes)
-        if not num_byte:
-            num_byte = '0'
+        return \
+            self.mainWarmUp() + \
+            newline + \
+            self.mainCalibration() + \
+            newline + \
+            self.mainMeasurement()
 
+    def mainWarmUp(self):
         return \
             f'// warm-up{newline}' + \
             f'for (size_t i = 0; i < nItWarmUp; ++i) {"{"}{newline}' + \
             newline.join(k.launch() for k in self.kernels) + newline + \
             f'{"}"}{newline}' + \
+            self.synchronize()
+
+    def mainCalibration(self):
+        # nIt = 0 requests doubling the number of iterations until a run takes at least the calibration time
+        return \
+            f'// calibration{newline}' + \
+            f'nItCalibration = 0;{newline}' + \
+            f'if (0 == nIt) {"{"}{newline}' + \
+            f'for (nIt = 1; ; nIt *= 2) {"{"}{newline}' + \
+            f'auto start = std::chrono::steady_clock::now();{newline}' + \
+            newline + \
+            f'for (size_t i = 0; i < nIt; ++i) {"{"}{newline}' + \
+            newline.join(k.launch() for k in self.kernels) + newline + \
+            f'{"}"}{newline}' + \
             self.synchronize() + \
             newline + \
+            f'auto end = std::chrono::steady_clock::now();{newline}' + \
+            f'nItCalibration += nIt;{newline}' + \
+            newline + \
+            f'if (std::chrono::duration<double>(end - start).count() >= calibrationTime()){newline}' + \
+            f'break;{newline}' + \
+            f'{"}"}{newline}' + \
+            f'{"}"}{newline}'
+
+    def mainMeasurement(self):
+        total_size = f'{math.prod(self.sizes) * self.steps_per_it}'
+
+        num_flop = sum(k.num_flop for k in self.kernels)
+        num_byte = self.numByte(self.kernels)
+
+        # echoed back in structured output to identify the measurement
+        echo = ', '.join(f'{{"{v}", (double) {v}}}' for v in [*self.sizes, 'nItWarmUp', *self.parameters])
+
+        timed = [k for k in self.kernels if not isinstance(k, PseudoKernel)] if self.backend.genKernelTimers else []
+        timer_teardown = [c for c in (self.backend.kernel_timer_teardown(k) for k in timed) if c is not None]
+
+        return \
             f'// measurement{newline}' + \
+            (f'// per-kernel timers{newline}' + newline.join(self.backend.kernel_timer_setup(k) for k in timed) + 2 * newline if timed else '') + \
+            f'perfControl("enable");{newline}' + \
             f'auto start = std::chrono::steady_clock::now();{newline}' + \
             newline + \
             f'for (size_t i = 0; i < nIt; ++i) {"{"}{newline}' + \
-            newline.join(k.launch() for k in self.kernels) + newline + \
+            newline.join(self.backend.timed_launch(k) if k in timed else k.launch() for k in self.kernels) + newline + \
             f'{"}"}{newline}' + \
             self.synchronize() + \
             newline + \
             f'auto end = std::chrono::steady_clock::now();{newline}' + \
+            f'perfControl("disable");{newline}' + \
             newline + \
-            f'printStats<tpe>(end - start, nIt, {total_size}, tpeName, {num_byte}, {num_flop});{newline}'
+            f'printStats<tpe>(end - start, nIt, {total_size}, tpeName, {num_byte}, {num_flop}, {"{"}{echo}{"}"});{newline}' + \
+            ''.join(f'printKernelStats("{k.fct_name}", kernelTime_{k.fct_name}, nIt, {total_size}, {self.numByte([k])}, {k.num_flop});{newline}' for k in timed) + \
+            (newline.join(timer_teardown) + newline if timer_teardown else '')
+
+    @staticmethod
+    def numByte(kernels):
+        # bytes per cell and step - kernels computing several steps per pass over memory move their fields once for all of them
+        num_bytes = []
+        for k in kernels:
+            num_byte = ' + '.join(f'sizeof({f.tpe})' for f in k.memory_reads + k.writes)
+            if num_byte and 1 != k.steps_per_pass:
+                num_byte = f'({num_byte}) / (double) {k.steps_per_pass}'
+            if num_byte:
+                num_bytes.append(num_byte)
+
+        return ' + '.join(num_bytes) if num_bytes else '0'
 
     def mainEnd(self):
+        return self.toHostCopies() + \
+            self.mainCheck('nItWarmUp + nItCalibration + nIt') + \
+            newline + \
+            self.kernelTearDowns() + \
+            self.fieldFrees() + newline + \
+            newline + \
+            f'return 0;{newline}' + \
+            f'{"}"}{newline}'
+
+    def mainCheck(self, num_it):
         size_list = ', '.join(f'{s}' for s in self.sizes) + (', ' if len(self.sizes) > 0 else '')
         field_list = ', '.join(f.name for f in self.fields) + (', ' if len(self.fields) > 0 else '')
 
@@ -126,20 +249,126 @@ class AbstractApplication:
         else:
             param_list = ''
 
-        return self.toHostCopies() + \
+        return \
             f'// check solution{newline}' + \
-            f'checkSolution{self.app.title().replace("-", "")}<tpe>({field_list}{size_list}nIt + nItWarmUp{param_list});{newline}' + \
+            f'checkSolution{self.app.title().replace("-", "")}<tpe>({field_list}{size_list}{num_it}{param_list});{newline}'
+
+    def sweepSetUp(self):
+        return ''
+
+    def sweepTearDown(self):
+        return ''
+
+    def sweepAllocate(self):
+        return self.fieldAllocates() + newline
+
+    def sweepFree(self):
+        return self.fieldFrees() + newline
+
+    def sweepPoint(self):
+        return \
+            self.mainInit() + \
             newline + \
-            self.fieldFrees() + newline + \
+            self.mainWarmUp() + \
             newline + \
-            f'return 0;{newline}' + \
+            self.mainCalibration() + \
+            newline + \
+            self.sweepMeasurement() + \
+            newline + \
+            self.toHostCopies() + \
+            self.mainCheck('nItWarmUp + nItCalibration + nRepeat * nIt')
+
+    def sweepMeasurement(self):
+        return \
+            f'for (size_t r = 0; r < nRepeat; ++r) {"{"}{newline}' + \
+            self.mainMeasurement() + \
             f'{"}"}{newline}'
 
+    def mainSweep(self):
+        # alternative entry point measuring a list of sizes with a single set of allocations
+        #   arguments are tpe sweep nRepeat nItWarmUp [parameters], followed by sizes and nIt of each point
+        if not self.backend.genSweep:
+            return ''
+
+        point_size = len(self.sizes) + 1
+        first_point = 5 + len(self.parameters)
+
+        param_decls = ''.join(f'{p.tpe} {p.name} = atoi(argv[{5 + i}]);{newline}' for i, p in enumerate(self.parameters))
+        size_decls = ''.join(f'{s.tpe} {s} = 0;{newline}' for s in self.sizes)
+        max_sizes = newline.join(f'{s} = std::max({s}, points[p + {d}]);' for d, s in enumerate(self.sizes))
+        point_sizes = newline.join(f'{s} = points[p + {d}];' for d, s in enumerate(self.sizes))
+
+        return \
+            f'template<typename tpe>{newline}' + \
+            f'inline int sweepMain(int argc, char *argv[]) {"{"}{newline}' + \
+            f'char* tpeName = argv[1];{newline}' + \
+            f'size_t nRepeat = atoi(argv[3]);{newline}' + \
+            f'size_t nItWarmUp = atoi(argv[4]);{newline}' + \
+            f'size_t nIt, nItCalibration;{newline}' + \
+            param_decls + \
+            newline + \
+            f'std::vector<size_t> points;{newline}' + \
+            f'for (int i = {first_point}; i + {point_size - 1} < argc; i += {point_size}) {"{"}{newline}' + \
+            ''.join(f'points.push_back(atoi(argv[i + {d}]));{newline}' for d in range(point_size)) + \
+            f'{"}"}{newline}' + \
+            newline + \
+            f'// allocate for the largest sizes{newline}' + \
+            size_decls + \
+            f'for (size_t p = 0; p < points.size(); p += {point_size}) {"{"}{newline}' + \
+            max_sizes + newline + \
+            f'{"}"}{newline}' + \
+            newline + \
+            self.sweepSetUp() + \
+            self.sweepAllocate() + \
+            newline + \
+            self.kernelSetUps() + \
+            f'for (size_t p = 0; p < points.size(); p += {point_size}) {"{"}{newline}' + \
+            point_sizes + newline + \
+            f'nIt = points[p + {point_size - 1}];{newline}' + \
+            newline + \
+            self.sweepPoint() + \
+            f'{"}"}{newline}' + \
+            newline + \
+            self.kernelTearDowns() + \
+            self.sweepFree() + \
+            self.sweepTearDown() + \
+            newline + \
+            f'return 0;{newline}' + \
+            f'{"}"}{newline}' + \
+            2 * newline
+
+    def mainDispatch(self, entry):
+        # one branch per data type, types depending on compiler support are guarded by the corresponding macro
+        branches = []
+        for tpe, cpp_tpe in self.backend.types.items():
+            branch = f'if ("{tpe}" == tpeName){newline}return {entry}<{cpp_tpe}>(argc, argv);'
+            if tpe in self.backend.type_guards:
+                branch = f'#ifdef {self.backend.type_guards[tpe]}{newline}{branch}{newline}#endif'
+            branches.append(branch)
+
+        return newline.join(branches)
+
+    def supportedTypes(self):
+        # printed under the same guards as the dispatch, i.e. only types the binary was compiled for are listed
+        types = [tpe for tpe in self.backend.types if tpe not in self.backend.type_guards]
+        guarded = newline.join(f'#ifdef {guard}{newline}std::cerr << ", {tpe}";{newline}#endif'
+                               for tpe, guard in self.backend.type_guards.items() if tpe in self.backend.types)
+
+        return \
+            f'std::cerr << "  {", ".join(types)}";{newline}' + \
+            (guarded + newline if guarded else '') + \
+            f'std::cerr << std::endl;'
+
     def mainWrapper(self):
-        types = ['int', 'long', 'float', 'double']
+        switch = self.mainDispatch('realMain')
 
-        switch = newline.join(f'if ("{tpe}" == tpeName){newline}return realMain<{tpe}>(argc, argv);'
-                              for tpe in types)
+        if self.backend.genSweep:
+            switch = \
+                f'if (argc > 2 && std::string("sweep") == argv[2]) {"{"}{newline}' + \
+                self.mainDispatch('sweepMain') + newline + \
+                f'{"}"}{newline}' + \
+                newline + \
+                switch
 
         body = \
             f'if (argc < 2) {"{"}{newline}' + \
@@ -151,9 +380,9 @@ class AbstractApplication:
             f'{newline}' + \
             switch + newline + \
             newline + \
-            f'std::cout << "Invalid type specification (" << argv[1] << "); supported types are" << std::endl;{newline}' + \
-            f'std::cout << "  {", ".join(types)}" << std::endl;{newline}' + \
-            f'return -1;{newline}'
+            f'std::cerr << "Invalid type specification (" << argv[1] << "); supported types are" << std::endl;{newline}' + \
+            self.supportedTypes() + newline + \
+            f'return unsupportedExitCode;{newline}'
 
         return \
             f'int main(int argc, char *argv[]) {"{"}{newline}' + \
@@ -1,3 +1,6 @@
+import re
+
+
 class AbstractKernel:
     def __init__(self, name, variables, reads, writes, it_space, body, has_tpe_template, num_flop):
         self.name = name
@@ -6,10 +9,28 @@ class AbstractKernel:
         self.variables = variables
         self.reads = reads
         self.writes = writes
+        self.memory_reads = reads  # fields read from memory, i.e. without those a fused kernel computes itself
         self.it_space = it_space
         self.body = body
         self.has_tpe_template = has_tpe_template
         self.num_flop = num_flop
+        self.steps_per_pass = 1  # time steps computed per pass over memory, i.e. per read and write of the fields
+        self.tuning = {}
+
+    def tune(self, tuning):
+        # code generation settings tuned for the machine and app per dimensionality, e.g. block sizes written by tune.py
+        self.tuning = {setting: {int(d): value for d, value in values.items()} for setting, values in tuning.items()}
+
+    def tuned(self, setting, default):
+        # tuned value of the setting for the dimensionality of the kernel, default if it was not tuned
+        return self.tuning.get(setting, {}).get(len(self.it_space), default)
+
+    def setUp(self):
+        # code run once before the first launch, e.g. checking device limits - None if not needed
+        return None
+
+    def tearDown(self):
+        return None
 
     def launch(self):
         pass
@@ -17,13 +38,23 @@ class AbstractKernel:
     def generate(self):
         pass
 
+    def isPointwise(self, field):
+        # all accesses of the field in the body are at the current iteration point, e.g. u[i0] or u(i0) depending on the back end
+        pointwise_access = f'{field.access([it[0] for it in self.it_space])}'
+        accesses = re.findall(rf'(?<![\w.]){re.escape(pointwise_access[: len(field.name) + 1])}', f'{self.body}')
+        pointwise = re.findall(rf'(?<![\w.]){re.escape(pointwise_access)}', f'{self.body}')
+
+        return len(accesses) == len(pointwise)
+
 
 class PseudoKernel:
     def __init__(self, code):
         self.code = code
         self.reads = []
         self.writes = []
+        self.memory_reads = []
         self.num_flop = 0
+        self.steps_per_pass = 1
 
     def launch(self):
         return f'{self.code}'
@@ -1,3 +1,10 @@
+machines = [
+    'nvidia.docker.a40', 'nvidia.docker.a100', 'nvidia.docker.h100', 'nvidia.docker.h200',
+    'nvidia.alex.a40', 'nvidia.alex.a100',
+    'nvidia.helma.h100', 'nvidia.helma.h200',
+    'amd.testfront.aquavan1.mi300x', 'amd.testfront.aquavan2.mi300a']
+
+
 def platform(machine, backend):
     # Supported machines:
     #   nvidia
@@ -17,11 +24,7 @@ def platform(machine, backend):
     #           .aquavan1.mi300x
     #           .aquavan2.mi300a
 
-    if machine not in [
-        'nvidia.docker.a40', 'nvidia.docker.a100', 'nvidia.docker.h100', 'nvidia.docker.h200',
-        'nvidia.alex.a40', 'nvidia.alex.a100',
-        'nvidia.helma.h100', 'nvidia.helma.h200',
-        'amd.testfront.aquavan1.mi300x', 'amd.testfront.aquavan2.mi300a']:
+    if machine not in machines:
         raise ValueError(f'Unknown machine: {machine}')
 
 
@@ -61,11 +64,11 @@ def platform(machine, backend):
 
     compiler, flags, libs = None, None, None
 
-    if backend in ['Base', 'OpenMP Host']:
+    if backend in ['Base', 'OpenMP Host', 'Base Tiled', 'OpenMP Host Tiled']:
         # default for all machines
         compiler = 'g++'
         flags = ['-O3', '-march=native', '-std=c++17']
-        if backend in ['OpenMP Host']:
+        if backend in ['OpenMP Host', 'OpenMP Host Tiled']:
             flags.append('-fopenmp')
 
     elif backend.startswith('CUDA'):
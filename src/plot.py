@@ -6,6 +6,87 @@ from apps import get_default_apps
 
 from backend.backend import Backend
 
+import measurements
+import roofline
+
+
+def plot_roofline(machine, app, df, data_folder):
+    peaks = roofline.load_peaks(machine)
+    if 0 == len(peaks) or 0 == len(df):
+        print(f'No peaks known for {machine}, skipping roofline plot')
+        return
+
+    df = roofline.annotate(machine, app, df)
+
+    plot_file_name = data_folder / f'{app.name}-{machine}-roofline'
+    print(f'Plotting roofline to \'{plot_file_name}.pdf\'')
+
+    plt.figure(figsize=[11.7, 8.3])
+
+    # ceilings of all devices and types measured
+    ais = [2 ** (0.25 * i) for i in range(-40, 41)]
+    for tpe in df['type'].unique():
+        for device in peaks:
+            if tpe in peaks[device]:
+                plt.plot(ais, [roofline.ceiling(peaks, device, tpe, ai) for ai in ais], '--', label=f'{device} peak ({tpe})')
+
+    # every measurement at the intensity of its app, kernels with timings at their own intensity
+    for version, group in df[(df['intensity'] > 0) & (df['compute'] > 0)].groupby(['backend', 'type']):
+        plt.scatter(group['intensity'], group['compute'], s=8, label=f'{version[0]} ({version[1]})')
+
+        for kernel, ai in roofline.intensities(app, version[1])[1].items():
+            if f'{kernel}Bandwidth' in group.columns and ai > 0:
+                plt.scatter([ai] * len(group), ai * group[f'{kernel}Bandwidth'], s=12, marker='x', label=f'{version[0]} ({version[1]}) - {kernel}')
+
+    plt.xscale('log')
+    plt.yscale('log')
+    plt.xlabel('arithmetic intensity [FLOP/B]')
+    plt.ylabel('performance [GFLOP/s]')
+    plt.title(f'{app.name} on {machine}')
+    plt.legend()
+
+    plt.savefig(f'{plot_file_name}.pdf')
+    plt.savefig(f'{plot_file_name}.png')
+    plt.close()
+
+
+def plot_scaling(machine, app, df, data_folder):
+    df = df[df['numThreads'] > 0]
+    if 0 == len(df):
+        return
+
+    plot_file_name = data_folder / f'{app.name}-{machine}-scaling'
+    print(f'Plotting thread scaling to \'{plot_file_name}.pdf\'')
+
+    fig, (ax_speedup, ax_efficiency) = plt.subplots(1, 2, figsize=[11.7, 8.3])
+
+    # strong scaling relative to one thread, for the largest size measured with one thread
+    for version, group in df.groupby(['backend', 'type', 'procBind', *app.additional_parameters]):
+        serial = group[1 == group['numThreads']]
+        if 0 == len(serial):
+            continue
+
+        group = group[serial['nx'].max() == group['nx']].sort_values('numThreads')
+        speedup = group['mlups'] / group[1 == group['numThreads']]['mlups'].max()
+
+        label = f'{version[0]} ({version[1]}, {version[2]})' + (' - ' + ', '.join(f'{p}' for p in version[3:]) if len(version) > 3 else '')
+        ax_speedup.plot(group['numThreads'], speedup, marker='o', label=label)
+        ax_efficiency.plot(group['numThreads'], speedup / group['numThreads'], marker='o', label=label)
+
+    num_threads = sorted(df['numThreads'].unique())
+    ax_speedup.plot(num_threads, num_threads, 'k--', label='ideal')
+
+    for ax, ylabel in [(ax_speedup, 'speedup'), (ax_efficiency, 'parallel efficiency')]:
+        ax.set_xscale('log', base=2)
+        ax.set_xlabel('number of threads')
+        ax.set_ylabel(ylabel)
+        ax.legend()
+    fig.suptitle(f'{app.name} on {machine}')
+
+    fig.savefig(f'{plot_file_name}.pdf')
+    fig.savefig(f'{plot_file_name}.png')
+    plt.close(fig)
+
 
 def plot(machines, app, show_plot=False):
     print(f'Running {app.group}/{app.name} ...')
@@ -20,17 +101,19 @@ def plot(machines, app, show_plot=False):
         data_folder = Backend.default_measurement_dir(machine, app)
         data_folder.mkdir(parents=True, exist_ok=True)
 
-        # configure measurement data file and read it
+        # configure measurement data file and read it, including not yet compacted measurements
         data_file = data_folder / Backend.default_measurement_file(machine, app)
-        columns = ['index', 'gpu', 'backend', 'nx', 'ny', 'nz', 'nIt', 'nWarmUp', 'type', *app.additional_parameters, 'time', 'mlups', 'bandwidth', 'compute']
-        index = 'index'
 
-        df = pd.concat([df, pd.read_csv(data_file, header=0, names=columns, index_col=index)], ignore_index=True)
+        df = pd.concat([df, measurements.load(machine, app)], ignore_index=True)
+
+        plot_roofline(machine, app, measurements.load(machine, app), data_folder)
+        plot_scaling(machine, app, measurements.load(machine, app), data_folder)
 
     # add auxiliary columns
     df['numCells'] = df['nx'] * df['ny'] * df['nz']
     df['version'] = df[['backend', 'gpu', 'type', *app.additional_parameters]].apply(
         lambda x: f'{x[0]} ({x[1]}, {x[2]})' + (' - ' + ', '.join([f'{p}' for p in x[3:]]) if len(x) > 3 else ''), axis=1)
+    df['version'] += df.apply(lambda x: f' - {int(x["numThreads"])} threads ({x["procBind"]})' if x['numThreads'] > 0 else '', axis=1)
 
     # filter by data type
     types = df['type'].unique()
@@ -0,0 +1,107 @@
+from pathlib import Path
+import json
+import os
+
+from backend.base import Base
+from backends import get_default_backends
+
+from node.kernel import PseudoKernel
+
+
+type_sizes = {'int': 4, 'long': 8, 'half': 2, 'bfloat16': 2, 'float': 4, 'double': 8, 'size_t': 8}
+
+
+def default_machine_file(machine):
+    # per machine metadata, e.g. peak bandwidth in GB/s and compute in GFLOP/s per device and data type
+    #   {"gpu": {"double": {"bandwidth": 696, "compute": 37400}}, "host": {...}}
+    return Path('..') / 'machines' / f'{machine}.json'
+
+
+def load_peaks(machine):
+    machine_file = default_machine_file(machine)
+    if not machine_file.is_file():
+        return {}
+
+    return json.loads(machine_file.read_text())
+
+
+def store_peaks(machine, peaks):
+    machine_file = default_machine_file(machine)
+    machine_file.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_file = machine_file.with_suffix('.json.tmp')
+    tmp_file.write_text(json.dumps(peaks, indent=4) + '\n')
+    os.replace(tmp_file, machine_file)
+
+    print(f'Wrote peaks to \'{machine_file}\'')
+
+
+def device(backend):
+    return 'host' if backend.host else 'gpu'
+
+
+def num_byte(kernels, tpe):
+    return sum(type_sizes[tpe if 'tpe' == f.tpe else f.tpe] for k in kernels for f in k.memory_reads + k.writes)
+
+
+def intensity(kernels, tpe):
+    # flop per byte for a single time step per pass over memory, consistent with the per cell counts passed to printStats
+    num_flop = sum(k.num_flop for k in kernels)
+    return num_flop / num_byte(kernels, tpe) if num_byte(kernels, tpe) > 0 else 0
+
+
+def intensities(app, tpe):
+    # arithmetic intensity of the whole application and of each of its (non-pseudo) kernels
+    kernels = app.compose_app(Base).kernels
+
+    return intensity(kernels, tpe), {k.fct_name: intensity([k], tpe) for k in kernels if not isinstance(k, PseudoKernel)}
+
+
+def steps_per_pass(app, backend):
+    # parameter giving the number of time steps the back end computes per pass over memory, None for a single step
+    application = app.compose_app(backend)
+    for kernel in application.kernels:
+        if 1 != kernel.steps_per_pass:
+            return app.additional_parameters[application.parameters.index(kernel.steps_per_pass)]
+
+    return None
+
+
+def ceiling(peaks, device, tpe, ai):
+    # attainable GFLOP/s for the given arithmetic intensity
+    peak = peaks.get(device, {}).get(tpe)
+    if peak is None:
+        return None
+
+    return min(peak['compute'], ai * peak['bandwidth'])
+
+
+def annotate(machine, app, df):
+    # adds arithmetic intensity and percent of peak columns, peaks missing for a device or type are left empty
+    peaks = load_peaks(machine)
+    backends = {backend.name: backend for backend in get_default_backends(machine)['all']}
+    devices = {name: device(backend) for name, backend in backends.items()}
+    ais = {tpe: intensities(app, tpe)[0] for tpe in df['type'].unique()}
+    steps = {name: steps_per_pass(app, backends[name]) for name in df['backend'].unique() if name in backends}
+
+    def row_steps(row):
+        # fields are moved once for all time steps of a pass over memory, which multiplies the intensity
+        step_param = steps.get(row['backend'])
+        return row[step_param] if step_param is not None else 1
+
+    def percent_of_peak(row):
+        peak = peaks.get(devices.get(row['backend']), {}).get(row['type'])
+        if peak is None:
+            return [None, None, None]
+
+        memory_bound = row['intensity'] * peak['bandwidth'] <= peak['compute']
+        return [100 * row['bandwidth'] / peak['bandwidth'],
+                100 * row['compute'] / peak['compute'],
+                100 * (row['bandwidth'] / peak['bandwidth'] if memory_bound else row['compute'] / peak['compute'])]
+
+    df['intensity'] = df['type'].map(ais)
+    if len(df) > 0:
+        df['intensity'] *= df.apply(row_steps, axis=1)
+        df[['percentOfPeakBandwidth', 'percentOfPeakCompute', 'percentOfRoofline']] = df.apply(percent_of_peak, axis=1, result_type='expand')
+
+    return df
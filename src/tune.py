@@ -0,0 +1,196 @@
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+
+from apps import get_default_apps
+
+from backends import get_default_backends
+from backend.backend import Backend
+from platforms import platform
+
+from benchmark import default_env, run_points
+from compile import compile
+from generate import generate
+
+
+# back ends considered, the first one available on the machine is used
+tuning_backends = ['cuda-expl', 'hip-expl']
+tiling_backends = ['omp-host-tiled', 'base-tiled']
+temporal_backends = ['omp-host', 'base']
+
+# block sizes tried per dimensionality
+candidate_block_sizes = {
+    1: [[64], [128], [256], [512], [1024]],
+    2: [[16, 16], [32, 4], [32, 8], [32, 16], [64, 4], [128, 2]],
+    3: [[16, 4, 4], [32, 2, 2], [32, 4, 2], [32, 4, 4], [64, 2, 2], [8, 8, 8]]
+}
+
+# tile sizes of host loop nests tried per dimensionality, loops over one dimension are not tiled
+candidate_tile_sizes = {
+    2: [[128, 32], [256, 16], [512, 32], [1024, 8], [2048, 4], [4096, 16]],
+    3: [[64, 8, 8], [128, 16, 8], [256, 8, 8], [256, 16, 16], [512, 16, 4], [1024, 4, 4]]
+}
+
+# tile sizes of temporally blocked host kernels tried per dimensionality, excluding the halo of numSteps points on each side
+candidate_temporal_tile_sizes = {
+    1: [[2048], [8192], [32768]],
+    2: [[256, 64], [512, 16], [512, 64], [1024, 32]],
+    3: [[64, 16, 16], [128, 16, 16], [64, 32, 16], [32, 32, 32]]
+}
+
+
+def store_tuning(machine, tuning):
+    tuning_file = Backend.default_tuning_file(machine)
+    tuning_file.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_file = tuning_file.with_suffix('.json.tmp')
+    tmp_file.write_text(json.dumps(tuning, indent=4) + '\n')
+    os.replace(tmp_file, tuning_file)
+
+    print(f'Wrote tuning table to \'{tuning_file}\'')
+
+
+def tuning_backend(machine, backends, short_names):
+    for short_name in short_names:
+        if short_name in backends and platform(machine, backends[short_name][0].name)[0] is not None:
+            return backends[short_name][0]
+
+    return None
+
+
+def tuning_sizes(app, num_sizes):
+    # subset of the benchmarked sizes, evenly spread over their (logarithmic) range
+    sizes = app.sizes_to_bench()
+
+    return sorted({sizes[round(i * (len(sizes) - 1) / (num_sizes - 1))] for i in range(num_sizes)})
+
+
+def measure(machine, app, backend, tpe, tuning, sizes, num_repeat):
+    # MLUP/s per size with the given tuning, e.g. one block size for all kernels, geometric mean over the parameter sets of the app
+    application = app.compose_app(backend)
+    application.tune(tuning)
+    backend.print_code_file(machine, app, application.generate())
+    backend.compile_bin(machine, app)
+
+    bin_file = backend.default_bin_dir(machine, app) / backend.default_bin_file(machine, app)
+    points = [(size, 2, 0, None) for size in sizes]
+
+    mlups = {size: [] for size in sizes}
+    for params in app.params_to_bench():
+        best = {}
+        for r in run_points(bin_file, app, tpe, params, points, num_repeat, default_env(), True):
+            best[int(r['nx'])] = max(best.get(int(r['nx']), 0), r['mlups'])
+        for size in sizes:
+            mlups[size].append(best[size])
+
+    return {size: statistics.geometric_mean(m) for size, m in mlups.items()}
+
+
+def size_ranges(sizes, winners, num_dims):
+    # neighbouring sizes with the same best block size are merged, ranges are split at the geometric mean of their number of points
+    block_sizes = []
+    for i, (size, block_size) in enumerate(zip(sizes, winners)):
+        if i + 1 < len(sizes) and winners[i + 1] == block_size:
+            continue
+
+        max_points = int(math.sqrt((size * sizes[i + 1]) ** num_dims)) if i + 1 < len(sizes) else None
+        block_sizes.append([max_points, block_size])
+
+    return block_sizes
+
+
+def tune(machine, app_names, tpe, apps, backends, num_sizes=8, num_repeat=3):
+    backend = tuning_backend(machine, backends, tuning_backends)
+    if backend is None:
+        print(f'No back end available to tune block sizes on {machine}')
+        return
+
+    tuning = Backend.load_tuning(machine)
+
+    for app in dict.fromkeys(app for app_name in app_names for app in apps[app_name]):
+        print(f'Tuning block sizes of {app.name} with {backend.name} ...')
+
+        num_dims = app.dimensionality
+        sizes = tuning_sizes(app, num_sizes)
+
+        try:
+            results = {tuple(block_size): measure(machine, app, backend, tpe, {'blockSizes': {num_dims: [[None, block_size]]}}, sizes, num_repeat)
+                       for block_size in candidate_block_sizes[num_dims]}
+        except (subprocess.CalledProcessError, OSError):
+            print(f'Failed to tune block sizes of {app.name} on {machine}')
+            continue
+
+        winners = [list(max(results, key=lambda block_size: results[block_size][size])) for size in sizes]
+        for size, block_size in zip(sizes, winners):
+            print(f'  ... size {size}: {block_size} with {results[tuple(block_size)][size]:.1f} MLUP/s')
+
+        # stored after each app to keep the results of an interrupted run
+        tuning.setdefault(app.name, {})['blockSizes'] = {num_dims: size_ranges(sizes, winners, num_dims)}
+        store_tuning(machine, tuning)
+
+        # code and binary of the app with the tuned block sizes
+        generate(machine, app.name, backend.short_name, apps, backends)
+        compile(machine, app.name, backend.short_name, False, apps, backends)
+
+
+def tune_tiles(machine, app_names, tpe, apps, backends, temporal=False, num_sizes=4, num_repeat=3):
+    # tiles of the loop nests of the tiled back ends or, if temporal is set, of the temporally blocked kernels of the host back ends
+    setting, short_names, candidates = \
+        ('temporalTileSizes', temporal_backends, candidate_temporal_tile_sizes) if temporal else ('tileSizes', tiling_backends, candidate_tile_sizes)
+
+    backend = tuning_backend(machine, backends, short_names)
+    if backend is None:
+        print(f'No back end available to tune tile sizes on {machine}')
+        return
+
+    tuning = Backend.load_tuning(machine)
+
+    for app in dict.fromkeys(app for app_name in app_names for app in apps[app_name]):
+        num_dims = app.dimensionality
+        if num_dims not in candidates:
+            continue
+        if temporal and all(1 == k.steps_per_pass for k in app.compose_app(backend).kernels):
+            continue
+
+        print(f'Tuning tile sizes of {app.name} with {backend.name} ...')
+
+        # tiling only pays off once the data reused between neighbouring points no longer fits into the caches
+        sizes = app.sizes_to_bench()[-num_sizes:]
+
+        try:
+            results = {tuple(tile_sizes): statistics.geometric_mean(measure(machine, app, backend, tpe, {setting: {num_dims: tile_sizes}}, sizes, num_repeat).values())
+                       for tile_sizes in candidates[num_dims]}
+        except (subprocess.CalledProcessError, OSError):
+            print(f'Failed to tune tile sizes of {app.name} on {machine}')
+            continue
+
+        winner = list(max(results, key=lambda tile_sizes: results[tile_sizes]))
+        print(f'  ... {winner} with {results[tuple(winner)]:.1f} MLUP/s')
+
+        tuning.setdefault(app.name, {})[setting] = {num_dims: winner}
+        store_tuning(machine, tuning)
+
+        generate(machine, app.name, backend.short_name, apps, backends)
+        compile(machine, app.name, backend.short_name, False, apps, backends)
+
+
+if __name__ == '__main__':
+    # tune the tile sizes of the tiled host back ends instead of block sizes if --tiles is given, those of temporally blocked host
+    #   kernels if --temporal-tiles is given
+    args = [a for a in sys.argv if a not in ['--tiles', '--temporal-tiles']]
+
+    if len(args) < 2:
+        print(f'Usage: python {args[0]} machine [apps] [type] [--tiles | --temporal-tiles]')
+        exit(1)
+
+    cla_apps = args[2].split(',') if len(args) > 2 else ['all']  # 'stream,stencil-3d'
+    cla_type = args[3] if len(args) > 3 else 'double'
+
+    for cla_machine in args[1].split(','):  # 'nvidia.alex.a40'
+        if '--tiles' in sys.argv or '--temporal-tiles' in sys.argv:
+            tune_tiles(cla_machine, cla_apps, cla_type, get_default_apps(), get_default_backends(cla_machine), '--temporal-tiles' in sys.argv)
+        else:
+            tune(cla_machine, cla_apps, cla_type, get_default_apps(), get_default_backends(cla_machine))
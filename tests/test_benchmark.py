@@ -0,0 +1,121 @@
+import math
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+sys.path.insert(0, f'{src_dir}')
+
+import benchmark
+
+
+class TestMeasurementKey(unittest.TestCase):
+    def test_normalized_param(self):
+        self.assertEqual('4', benchmark.normalized_param(4))
+        self.assertEqual('4', benchmark.normalized_param(4.0))
+        self.assertEqual('4', benchmark.normalized_param('4.0'))
+        self.assertEqual('0.5', benchmark.normalized_param(0.5))
+        self.assertEqual('close', benchmark.normalized_param('close'))
+
+    def test_independent_of_column_types(self):
+        # as read from a csv file, where pandas may infer floats for integer columns padded with empty values
+        read = benchmark.measurement_key('A40', 'CUDA Explicit Memory', 64.0, 1, 1, 1024.0, 2, 'double', 0.0, 'close', ['2.0'])
+        pending = benchmark.measurement_key('A40', 'CUDA Explicit Memory', 64, 1, 1, 1024, 2, 'double', 0, 'close', [2])
+
+        self.assertEqual(pending, read)
+        self.assertNotEqual(pending, benchmark.measurement_key('A40', 'CUDA Explicit Memory', 64, 1, 1, 1024, 2, 'float', 0, 'close', [2]))
+
+    def test_calibrated_key(self):
+        key = benchmark.measurement_key('A40', 'Base', 64, 1, 1, 4096, 2, 'double', 0, 'close', [])
+
+        self.assertEqual(benchmark.measurement_key('A40', 'Base', 64, 1, 1, 0, 2, 'double', 0, 'close', []), benchmark.calibrated_key(key))
+
+
+class TestSampleStats(unittest.TestCase):
+    def test_stats(self):
+        stats = benchmark.sample_stats([1.0, 2.0, 3.0])
+
+        self.assertEqual(1.0, stats['min'])
+        self.assertEqual(2.0, stats['median'])
+        self.assertEqual(3, stats['count'])
+        self.assertAlmostEqual(1.96 * math.sqrt(math.pi / 2) / math.sqrt(3) / 2, stats['dispersion'])
+
+    def test_degenerate_samples(self):
+        self.assertEqual(math.inf, benchmark.sample_stats([]).get('dispersion'))
+        self.assertEqual(math.inf, benchmark.sample_stats([2.0])['dispersion'])
+        self.assertEqual(math.inf, benchmark.sample_stats([0.0, 0.0])['dispersion'])
+
+    def test_converged(self):
+        self.assertTrue(benchmark.converged([1.0] * 3, 0.02, 30, 10))
+        self.assertFalse(benchmark.converged([1.0, 2.0, 3.0], 0.02, 30, 10))
+        self.assertFalse(benchmark.converged([], 0.02, 30, 10))
+        # out of repetitions or of the time budget in seconds, sample times are in ms
+        self.assertTrue(benchmark.converged([1.0, 2.0, 3.0], 0.02, 3, 10))
+        self.assertTrue(benchmark.converged([1000.0, 2000.0, 3000.0], 0.02, 30, 5))
+
+
+class TestParse(unittest.TestCase):
+    def test_parse_records(self):
+        out = '\n'.join([
+            'Running with 64 cells',
+            '{"nx": 64, "nIt": 1024, "time": 1.5}',
+            '{"kernel": "stream", "time": 1.0}',
+            '{"kernel": "increase", "time": 0.5}',
+            '  Final residual is 0',
+            '{"nx": 128, "nIt": 512, "time": 2.5}'])
+
+        records = benchmark.parse_records(out)
+
+        self.assertEqual([64, 128], [r['nx'] for r in records])
+        self.assertEqual(['stream', 'increase'], [k['kernel'] for k in records[0]['kernels']])
+        self.assertNotIn('kernels', records[1])
+
+    def test_parse_perf(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            perf_file = Path(tmp_dir) / 'perf.csv'
+            perf_file.write_text('\n'.join([
+                '# started on Mon Jan  1 00:00:00 2024',
+                '',
+                '123456789,,cycles,1000000,100.00,,',
+                '234567890,,instructions,1000000,100.00,1.90,insn per cycle',
+                '<not supported>,,LLC-store-misses,0,100.00,,',
+                '<not counted>,,LLC-load-misses,0,0.00,,']) + '\n')
+
+            counters = benchmark.parse_perf(perf_file)
+
+        self.assertEqual({'cycles': 123456789.0, 'instructions': 234567890.0}, counters)
+
+
+@unittest.skipIf(shutil.which('g++') is None, 'requires g++')
+class TestRecords(unittest.TestCase):
+    def test_non_finite(self):
+        # rates of a run too short to be timed are infinite or nan, which JSON can only represent as null
+        code = '''
+            #include "util.h"
+            int main() {
+                char tpeName[] = "double";
+                printStats<double>(std::chrono::duration<double>(0.0), 1, 64, tpeName, 16, 0, {{"nx", 64}});
+                printKernelStats("stream", 0.0, 1, 64, 16, 0);
+            }
+        '''
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            shutil.copy(src_dir.parent / 'generated' / 'util.h', Path(tmp_dir) / 'util.h')
+            (Path(tmp_dir) / 'records.cpp').write_text(code)
+            subprocess.run(['g++', '-std=c++17', '-o', Path(tmp_dir) / 'records', Path(tmp_dir) / 'records.cpp'], check=True)
+
+            out = subprocess.check_output([Path(tmp_dir) / 'records'], env={'APEX_OUTPUT': 'json'}, text=True)
+
+        records = benchmark.parse_records(out)
+
+        self.assertEqual(1, len(records))
+        self.assertEqual(64, records[0]['nx'])
+        self.assertIsNone(records[0]['mlups'])
+        self.assertIsNone(records[0]['compute'])
+        self.assertIsNone(records[0]['kernels'][0]['bandwidth'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+sys.path.insert(0, f'{src_dir}')
+
+import campaign
+
+
+class TestResume(unittest.TestCase):
+    def setUp(self):
+        # campaigns are stored relative to src, i.e. in ../campaigns
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        (Path(self.tmp_dir.name) / 'src').mkdir()
+        self.cwd = os.getcwd()
+        os.chdir(Path(self.tmp_dir.name) / 'src')
+
+        jobs = [{'id': i, 'machine': 'nvidia.alex.a40', 'app': 'stream', 'backend': 'cuda-expl', 'type': 'double', 'params': [],
+                 'numThreads': 0, 'procBind': 'close', 'size': size, 'nWarmUp': 2, 'nIt': 1024, 'priority': priority}
+                for i, (size, priority) in enumerate([(64, 0), (128, 1), (256, 0), (512, 1)])]
+        self.plan = {'budget': None, 'calibrate': False, 'settings': {}, 'jobs': jobs}
+
+        plan_file, _ = campaign.default_files('test')
+        plan_file.parent.mkdir(parents=True)
+        plan_file.write_text(json.dumps(self.plan))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def finish(self, job_id, line_end='\n'):
+        _, journal_file = campaign.default_files('test')
+        job = self.plan['jobs'][job_id]
+        record = {'id': job_id, **{k: job[k] for k in ['machine', 'app', 'backend', 'type', 'numThreads', 'procBind', 'size']}, 'wall': 1.0, 'elapsed': 1.0}
+        with open(journal_file, 'a') as f:
+            f.write(json.dumps(record)[:None if line_end else -1] + line_end)
+
+    def test_priority_order(self):
+        plan, done = campaign.load('test')
+
+        self.assertEqual([], done)
+        self.assertEqual([1, 3, 0, 2], [job['id'] for job in campaign.pending_jobs(plan, done)])
+
+    def test_resume(self):
+        self.finish(1)
+        self.finish(0)
+        # torn by an interruption while the job was recorded, i.e. not finished
+        self.finish(3, line_end='')
+
+        plan, done = campaign.load('test')
+
+        self.assertEqual([1, 0], [record['id'] for record in done])
+        self.assertEqual([3, 2], [job['id'] for job in campaign.pending_jobs(plan, done)])
+
+
+if __name__ == '__main__':
+    unittest.main()
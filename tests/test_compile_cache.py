@@ -0,0 +1,35 @@
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+sys.path.insert(0, f'{src_dir}')
+
+from compile_cache import CompileCache
+
+
+class TestKey(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.code_file = Path(self.tmp_dir.name) / 'app.cpp'
+        self.code_file.write_text('int main() { return 0; }\n')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_missing_compiler(self):
+        # compiled without the cache, which then reports the missing compiler itself
+        self.assertIsNone(CompileCache.key('apex-missing-compiler', ['-O3'], [], self.code_file, [self.code_file]))
+
+    @unittest.skipIf(shutil.which('g++') is None, 'requires g++')
+    def test_key(self):
+        key = CompileCache.key('g++', ['-O3'], [], self.code_file, [self.code_file])
+
+        self.assertEqual(key, CompileCache.key('g++', ['-O3'], [], self.code_file, [self.code_file]))
+        self.assertNotEqual(key, CompileCache.key('g++', ['-O2'], [], self.code_file, [self.code_file]))
+
+
+if __name__ == '__main__':
+    unittest.main()
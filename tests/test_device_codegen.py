@@ -0,0 +1,56 @@
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+sys.path.insert(0, f'{src_dir}')
+
+from apps import get_default_apps
+from backends import get_default_backends
+from backend.util_header import UtilHeader
+from platforms import platform
+
+
+class TestDeviceCodegen(unittest.TestCase):
+    # generated code of the GPU back ends is compiled with the compiler and flags compile.py uses for the machine, skipped if missing
+    #   grid-stride launches, temporally blocked stencils and the reduced precision types of the dispatch are covered by these apps
+    builds = {
+        'nvidia.alex.a40': ['cuda-expl', 'cuda-mm', 'cuda-expl-grid-stride', 'sycl-expl', 'sycl-mm', 'sycl-expl-grid-stride'],
+        'amd.testfront.aquavan1.mi300x': ['hip-expl', 'hip-mm', 'hip-expl-grid-stride'],
+    }
+    app_names = ['stream', 'stream-increase', 'stencil-1d', 'stencil-2d', 'stencil-3d']
+
+    def compile(self, machine, app, backend):
+        compiler, flags, _ = platform(machine, backend.name)
+        if shutil.which(compiler) is None:
+            self.skipTest(f'requires {compiler}')
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # same layout as generated/<machine>/<group>/<app> for the includes of the util headers
+            app_dir = Path(tmp_dir) / machine / app.group / app.name
+            app_dir.mkdir(parents=True)
+            for util_header in backend.util_headers:
+                shutil.copy(src_dir.parent / 'generated' / util_header, Path(tmp_dir) / util_header)
+            (app_dir / f'{app.name}-util.h').write_text(app.compose_app(UtilHeader).generate())
+
+            code_file = app_dir / backend.default_code_file(machine, app)
+            code_file.write_text(app.compose_app(backend).generate())
+
+            return subprocess.run([compiler, *flags, '-c', '-o', app_dir / f'{app.name}.o', code_file], capture_output=True, text=True)
+
+    def test_compiles(self):
+        apps = get_default_apps()
+        for machine, short_names in self.builds.items():
+            backends = get_default_backends(machine)
+            for short_name in short_names:
+                for app_name in self.app_names:
+                    with self.subTest(machine=machine, backend=short_name, app=app_name):
+                        result = self.compile(machine, apps[app_name][0], backends[short_name][0])
+                        self.assertEqual(0, result.returncode, result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
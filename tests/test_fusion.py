@@ -0,0 +1,74 @@
+import sys
+import unittest
+from pathlib import Path
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+sys.path.insert(0, f'{src_dir}')
+
+from backend.base import Base
+
+from node.assignment import Assignment
+from node.kernel import PseudoKernel
+from node.variable import Variable
+
+
+class FusedBase(Base):
+    genFusedKernels = True
+
+
+class TestFusion(unittest.TestCase):
+    def setUp(self):
+        self.i0 = Variable('i0', 'size_t')
+        self.sizes = [Variable('nx', 'size_t')]
+        self.it_space = [[self.i0, 0, self.sizes[0]]]
+
+        self.src = Base.Field('src', 'tpe', self.sizes)
+        self.dest = Base.Field('dest', 'tpe', self.sizes)
+
+    def kernel(self, name, reads, writes, body, it_space=None):
+        return Base.Kernel(name, self.sizes, reads, writes, self.it_space if it_space is None else it_space, body, num_flop=1)
+
+    def stream(self):
+        return self.kernel('stream', [self.src], [self.dest], Assignment(self.dest.access([self.i0]), self.src.access([self.i0]) + 1))
+
+    def increase(self):
+        return self.kernel('increase', [self.dest], [self.dest], Assignment(self.dest.access([self.i0]), 1, op='+='))
+
+    def shift(self):
+        return self.kernel('shift', [self.dest], [self.src], Assignment(self.src.access([self.i0]), self.dest.access([self.i0 + 1])))
+
+    def test_is_pointwise(self):
+        self.assertTrue(self.stream().isPointwise(self.src))
+        self.assertTrue(self.stream().isPointwise(self.dest))
+        self.assertFalse(self.shift().isPointwise(self.dest))
+        self.assertTrue(self.shift().isPointwise(self.src))
+
+    def test_fusible(self):
+        self.assertTrue(Base.Application.fusible(self.stream(), self.increase()))
+        # dest is read at a neighbouring point, i.e. written by another thread of the first kernel
+        self.assertFalse(Base.Application.fusible(self.stream(), self.shift()))
+        self.assertFalse(Base.Application.fusible(self.stream(), PseudoKernel('std::swap(src, dest);')))
+
+        half_it_space = [[self.i0, 0, self.sizes[0] / 2]]
+        self.assertFalse(Base.Application.fusible(self.stream(), self.kernel('increase', [self.dest], [self.dest],
+                                                                             Assignment(self.dest.access([self.i0]), 1, op='+='), half_it_space)))
+
+    def test_fuse_kernels(self):
+        swap = PseudoKernel('std::swap(src, dest);')
+        kernels = FusedBase.Application(FusedBase, 'test', self.sizes, [], [self.stream(), self.increase(), swap, self.shift()]).kernels
+
+        self.assertEqual(['stream-increase', swap, 'shift'], [k if isinstance(k, PseudoKernel) else k.name for k in kernels])
+        self.assertEqual(2, kernels[0].num_flop)
+        # dest is computed by the fused kernel itself and no longer read from memory
+        self.assertEqual([self.src], kernels[0].memory_reads)
+        self.assertEqual([self.src], kernels[0].reads[:1])
+        self.assertIn(self.dest, kernels[0].reads)
+
+    def test_unfused(self):
+        kernels = Base.Application(Base, 'test', self.sizes, [], [self.stream(), self.increase()]).kernels
+
+        self.assertEqual(['stream', 'increase'], [k.name for k in kernels])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+sys.path.insert(0, f'{src_dir}')
+
+from apps import get_default_apps
+
+import benchmark
+import measurements
+
+
+class TestJournal(unittest.TestCase):
+    machine = 'nvidia.alex.a40'
+
+    def setUp(self):
+        # measurements are stored relative to src, i.e. in ../measurements
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        (Path(self.tmp_dir.name) / 'src').mkdir()
+        self.cwd = os.getcwd()
+        os.chdir(Path(self.tmp_dir.name) / 'src')
+
+        self.app = get_default_apps()['stream'][0]
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def measurement(self, size, n_it=1024, calibrated=False):
+        return {'gpu': 'A40', 'device': None, 'backend': 'Base', 'nx': size, 'ny': 1, 'nz': 1, 'nIt': n_it, 'calibrated': calibrated,
+                'nWarmUp': 2, 'type': 'double', 'numThreads': 0, 'procBind': 'close',
+                'time': 1.0, 'mlups': 1.0, 'bandwidth': 16.0, 'compute': 1.0,
+                'timeMedian': 1.0, 'timeMean': 1.0, 'timeStdDev': 0.0, 'numSamples': 3, 'noisy': False}
+
+    def test_append(self):
+        measurements.append(self.machine, self.app, self.measurement(64))
+        measurements.append(self.machine, self.app, self.measurement(128))
+
+        _, journal_file = measurements.default_files(self.machine, self.app)
+        self.assertEqual([64, 128], [r['nx'] for r in measurements.read_journal(journal_file)])
+
+        # a record torn by a crash is dropped, the ones before it are kept
+        with open(journal_file, 'a') as f:
+            f.write('{"gpu": "A40", "nx"')
+        self.assertEqual([64, 128], [r['nx'] for r in measurements.read_journal(journal_file)])
+
+    def test_compact(self):
+        measurements.append(self.machine, self.app, self.measurement(128))
+        measurements.append(self.machine, self.app, self.measurement(64))
+
+        df = measurements.compact(self.machine, self.app)
+
+        output_file, journal_file = measurements.default_files(self.machine, self.app)
+        self.assertTrue(output_file.is_file())
+        self.assertFalse(journal_file.is_file())
+        self.assertEqual([64, 128], df['nx'].tolist())
+
+        # later measurements are read from the journal until the next compaction
+        measurements.append(self.machine, self.app, self.measurement(256, n_it=4096, calibrated=True))
+        df = measurements.load(self.machine, self.app)
+        self.assertEqual([64, 128, 256], df['nx'].tolist())
+
+        measured = benchmark.measured_keys(self.app, measurements.compact(self.machine, self.app))
+        self.assertIn(benchmark.measurement_key('A40', 'Base', 64, 1, 1, 1024, 2, 'double', 0, 'close', []), measured)
+        self.assertIn(benchmark.measurement_key('A40', 'Base', 256, 1, 1, 0, 2, 'double', 0, 'close', []), measured)
+        self.assertNotIn(benchmark.measurement_key('A40', 'Base', 64, 1, 1, 0, 2, 'double', 0, 'close', []), measured)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+sys.path.insert(0, f'{src_dir}')
+
+from apps import get_default_apps
+from backend.base import Base
+from backend.util_header import UtilHeader
+
+import benchmark
+
+
+@unittest.skipIf(shutil.which('g++') is None, 'requires g++')
+class TestHalfChecks(unittest.TestCase):
+    # apps whose values are incremented in each iteration, i.e. exceed the integers exactly representable in half
+    app_names = ['stream', 'increase', 'stream-increase', 'matrix-add']
+
+    def run_half(self, app):
+        # largest benchmarked size of at most 2^22 cells with the number of iterations benchmark.py uses for it
+        size = max(s for s in app.sizes_to_bench() if s**app.dimensionality <= 2**22)
+        n_warm, n_it = benchmark.iteration_counts(app, size)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # same layout as generated/<machine>/<group>/<app> for the include of util.h
+            app_dir = Path(tmp_dir) / 'machine' / app.group / app.name
+            app_dir.mkdir(parents=True)
+            shutil.copy(src_dir.parent / 'generated' / 'util.h', Path(tmp_dir) / 'util.h')
+            (app_dir / f'{app.name}-util.h').write_text(app.compose_app(UtilHeader).generate())
+            (app_dir / f'{app.name}-base.cpp').write_text(app.compose_app(Base).generate())
+
+            bin_file = app_dir / f'{app.name}-base'
+            subprocess.run(['g++', '-O2', '-std=c++17', '-o', bin_file, app_dir / f'{app.name}-base.cpp'], check=True)
+
+            return subprocess.run([bin_file, 'half', *[f'{size}'] * app.dimensionality, f'{n_warm}', f'{n_it}'], capture_output=True, text=True)
+
+    def test_checks(self):
+        apps = get_default_apps()
+        for app_name in self.app_names:
+            with self.subTest(app=app_name):
+                result = self.run_half(apps[app_name][0])
+                if benchmark.unsupported_exit_code == result.returncode:
+                    self.skipTest('compiler does not support _Float16')
+
+                self.assertEqual(0, result.returncode, result.stderr)
+                self.assertNotIn('check failed', result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
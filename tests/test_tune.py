@@ -0,0 +1,35 @@
+import math
+import sys
+import unittest
+from pathlib import Path
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+sys.path.insert(0, f'{src_dir}')
+
+from apps import get_default_apps
+
+import tune
+
+
+class TestSizes(unittest.TestCase):
+    def test_tuning_sizes(self):
+        app = get_default_apps()['stream'][0]
+        sizes = tune.tuning_sizes(app, 4)
+
+        self.assertEqual(4, len(sizes))
+        self.assertEqual(sorted(sizes), sizes)
+        self.assertEqual(app.sizes_to_bench()[0], sizes[0])
+        self.assertEqual(app.sizes_to_bench()[-1], sizes[-1])
+        self.assertTrue(all(s in app.sizes_to_bench() for s in sizes))
+
+    def test_size_ranges(self):
+        # neighbours with the same winner are merged, the last range is open
+        self.assertEqual([[int(math.sqrt(128 * 256)), [256]], [None, [512]]],
+                         tune.size_ranges([64, 128, 256, 512], [[256], [256], [512], [512]], 1))
+        self.assertEqual([[128 * 256, [16, 16]], [None, [32, 8]]],
+                         tune.size_ranges([128, 256], [[16, 16], [32, 8]], 2))
+        self.assertEqual([[None, [256]]], tune.size_ranges([64, 128], [[256], [256]], 1))
+
+
+if __name__ == '__main__':
+    unittest.main()